@@ -18,19 +18,32 @@
 # If the import modules fail then install using "pip install <module-name>"
 
 
-import requests
 import json
-import dateutil.parser
 import datetime
 import logging
 from datetime import timedelta
-from operator import itemgetter
+from operator import attrgetter
+from collections import namedtuple
 import jinja2
 import base64
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import sys, getopt
+import itertools
+import os
+import time
+
+# The ZenDesk API client shared with the other program is on the folder "Zendesk-Knowledge-Base-Client"
+# next to the folder of this program
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Zendesk-Knowledge-Base-Client"))
+import zendesk_kb_client
+from zendesk_kb_client import (
+    fn_add_query, fn_configure, fn_get_page, fn_get_pages, fn_get_user, fn_iter_pages, fn_make_record,
+    fn_parallel_map, fn_parse_time, fn_store_get, fn_store_open, fn_store_upsert, fn_transfer_report,
+    fn_transport_setup, fn_user_cache_load, fn_user_cache_put, fn_user_cache_save, fn_user_want, User
+)
 
 
 # Global parameters
@@ -75,12 +88,31 @@ username = "username"
 password = "password"
 
 
-# Authenticate the username / password here and set it globally
-# This authentications is used by the functions fn_get_categories_id() & fn_get_articles_info()
+# The username / password are set on the API session of the client by fn_configure() ( see main() )
+
+
+# Parameters : v_MaxWorkers
+# This parameter is used by fn_get_pages()
+# This is the maximum number of pages that are requested from the API at the same time.
+
+
+v_MaxWorkers = 8
+
+
+# Parameters : v_MaxCategoryWorkers
+# This parameter is used by main()
+# This is the maximum number of categories whose articles are pulled at the same time.
+
+
+v_MaxCategoryWorkers = 4
+
+
+# Parameters : v_PageSize
+# This parameter is used by fn_iter_pages()
+# This is the number of records requested on every page of the API ( the API allows at most 100 ).
 
 
-zd = requests.session()
-zd.auth = (username, password)
+v_PageSize = 100
 
 
 # Parameters : v_CheckDays ( default to a week )
@@ -91,6 +123,146 @@ zd.auth = (username, password)
 v_CheckDays = 8
 
 
+# Parameters : v_IncrementalMode & v_CursorFile
+# This parameter is used by main()
+# When the incremental mode is turned on, only the articles changed since the last run are requested from
+# the help center incremental API, the time of the last run is saved on the cursor file.
+# The first run ( without a cursor file ) asks for the articles changed in the last v_CheckDays.
+
+
+v_IncrementalMode = False
+v_CursorFile = 'new-kb-alerts.cursor'
+
+
+# Parameters : v_RateLimit, v_BucketSize, v_MaxRetries & v_MaxConcurrentRequests
+# This parameter is used by fn_get_page()
+# v_RateLimit is the API requests per minute allowed for the account ( updated from the X-Rate-Limit header ),
+# the requests are paced with a token bucket ( of v_BucketSize requests ) so that we don't go above it. When the API still sends
+# "429 Too Many Requests" the request is retried ( at most v_MaxRetries times ) after its Retry-After time.
+# The number of requests sent at the same time is raised ( up to v_MaxConcurrentRequests ) while the
+# X-Rate-Limit-Remaining shows enough quota left, and lowered when the quota is running out.
+
+
+v_RateLimit = 700
+v_BucketSize = 10
+v_MaxRetries = 5
+v_MaxConcurrentRequests = v_MaxWorkers * v_MaxCategoryWorkers
+
+
+# Parameters : v_FetchConcurrency
+# This parameter is used by fn_get_page_async()
+# All the pages requested in parallel ( fn_get_pages() ) are run on one fetch engine shared by the whole program,
+# a pool of v_FetchConcurrency threads that keep their connections to the API open and reuse them for the next page.
+
+
+v_FetchConcurrency = v_MaxConcurrentRequests
+
+
+# Parameters : v_PoolMaxSize, v_PoolBlock & v_AcceptEncoding
+# This parameter is used by fn_transport_setup()
+# v_PoolMaxSize is the number of keep-alive connections kept open to the API, one for every thread that calls the API
+# ( the fetch engine and the category threads ). With v_PoolBlock a thread waits for a free connection instead of
+# opening one more. The responses are requested compressed with v_AcceptEncoding ( "br" only when brotli is installed ).
+
+
+v_PoolMaxSize = v_FetchConcurrency + v_MaxCategoryWorkers
+v_PoolBlock = False
+v_AcceptEncoding = zendesk_kb_client.v_AcceptEncoding
+
+
+# Parameters : v_StreamChunkSize
+# This parameter is used by fn_stream_content()
+# The article pages are read and parsed v_StreamChunkSize bytes at a time ( see fn_json_stream() ).
+
+
+v_StreamChunkSize = 65536
+
+
+# Parameters : v_Locales
+# This parameter is used by fn_get_articles_info() & fn_get_incremental_articles()
+# The locales of the help center to check for changes, an article is changed when any of its translation
+# in these locales is changed. When set, the article listing is pulled without its translations and
+# only the translations ( of these locales ) of the articles whose updated_at is after the report period
+# ( and not already on the snapshot store ) are requested. Set to None to check all the translations.
+# eg.s v_Locales = ["en-us", "fr", "de", "es", "ja", "pt-br"]
+
+
+v_Locales = None
+
+
+# Parameters : v_SnapshotStore
+# This parameter is used by the fn_store_* functions
+# Path of the SQLite file where the articles, users, categories and sections are saved ( keyed by id ),
+# the same file can be shared with the analytics program. Set to None to turn off the snapshot store.
+# eg.s v_SnapshotStore = os.path.expanduser("~/zendesk-kb-snapshot.db")
+
+
+v_SnapshotStore = None
+
+
+# Parameters : v_CacheDir, v_CacheTTL & v_CacheMaxEntries
+# This parameter is used by fn_get_page()
+# The users, categories and sections listing rarely change, so their responses are saved on v_CacheDir.
+# A response younger than v_CacheTTL seconds is used without calling the API, an older one is checked with the
+# API using its ETag / Last-Modified ( unchanged pages come back as "304 Not Modified" without any content ).
+# Only the v_CacheMaxEntries most recently used responses are kept. Set v_CacheDir to None to turn off the cache.
+# The users listing has the names and emails of the users, the folder and the files are only readable by the owner.
+# eg.s v_CacheDir = os.path.expanduser("~/.zendesk-kb-cache")
+
+
+v_CacheDir = None
+v_CacheTTL = 3600
+v_CacheMaxEntries = 1000
+
+
+# Parameters : v_UserResolution, v_UserCacheFile, v_UserCacheTTL & v_UserCacheMaxEntries
+# This parameter is used by fn_UserInfo() & fn_get_user()
+# How the creator / updater names of the articles are found
+#       "ids"    : the users are requested when the report first needs their name ( 100 at a time using show_many )
+#       "agents" : all the agents of the account are pulled first ( role=agent ), the rest as "ids"
+#       "all"    : all the users of the account are pulled first
+# The v_UserCacheMaxEntries most recently used users are kept on the user cache, which is saved on
+# v_UserCacheFile for the next run. A saved user is used for v_UserCacheTTL seconds,
+# set v_UserCacheFile to None to not save the user cache.
+
+
+v_UserResolution = "ids"
+v_UserCacheFile = os.path.expanduser("~/.zendesk-kb-cache/users/users-by-id.json")
+v_UserCacheTTL = 86400
+v_UserCacheMaxEntries = 10000
+
+
+# Parameters : v_TemplateDir, v_TemplateFile & v_TemplateCacheDir
+# This parameter is used by fn_get_template()
+# The template v_TemplateFile on v_TemplateDir is precompiled into python modules on v_TemplateCacheDir and only compiled
+# again when the template ( or the jinja2 / python version ) changes, the jinja2 bytecode cache is also saved there.
+# Set v_TemplateCacheDir to None to compile the templates on every run.
+
+
+v_TemplateDir = "./"
+v_TemplateFile = "articles.html"
+v_TemplateCacheDir = os.path.expanduser("~/.zendesk-kb-cache/templates")
+
+
+# Parameters : v_NoContentHTML
+# This parameter is used by main()
+# The email sent when no articles are published / updated, the template is not rendered at all in that case.
+# {0} and {1} are the start and the end of the period checked, {2} is the period ( eg.s "past 8 day" ).
+
+
+v_NoContentHTML = """\
+        <html>
+        <head></head>
+        <h2 align="center"><font face="verdana"> Article published / updated from "{0}" to "{1}" </font></h2><body>
+        <p></p>
+        <p><font face="verdana"> No new articles published / updated {2}.
+        </font></p>
+        <p></p>
+        </body>
+        </html>
+        """
+
+
 # Global Functions
 
 # Function : fn_json_formatter
@@ -103,37 +275,102 @@ def fn_json_formatter(jsondata):
     print (jsonformatter)
 
 
-# Function : fn_get_page_count
-# Picks up the total pages under a url, this can be used to increment the web crawling
+# Function : fn_user_name(v_id)
+# Returns the name of the user ( empty if there is no such user ), this is used by the template.
+
+
+def fn_user_name(v_id):
+    user = fn_get_user(v_id)
+    return user.name if user is not None else ''
+
+
+# Function : fn_get_template(name)
+# The below function returns the jinja2 template from the environment that is created once per run
+# The environment reads the precompiled template modules first and the template files if not precompiled
+
 
+v_TemplateEnvironment = None
 
-def fn_get_page_count(url):
-    headers = {'Content-Type': 'application/json'}
-    response = zd.get(url, headers=headers)
-    data = response.json()
-    return data['page_count']
 
+def fn_get_template(name):
+    global v_TemplateEnvironment
+    if v_TemplateEnvironment is None:
+        v_TemplateEnvironment = fn_template_environment()
+    return v_TemplateEnvironment.get_template(name)
 
-# Function : fn_write_to_file(data)
-# The below function get the data from main() and write to a file with HTML tag
+
+# Function : fn_template_environment()
+# The below function creates the jinja2 environment, the templates are compiled into python modules
+# on v_TemplateCacheDir when it is newer than the last compile
+
+
+def fn_template_environment():
+    templateLoader = jinja2.FileSystemLoader(searchpath=v_TemplateDir)
+    if v_TemplateCacheDir is None:
+        return jinja2.Environment(loader=templateLoader)
+
+    v_moduledir = os.path.join(v_TemplateCacheDir, "modules")
+    v_bytecodedir = os.path.join(v_TemplateCacheDir, "bytecode")
+    try:
+        for v_dir in (v_moduledir, v_bytecodedir):
+            if not os.path.isdir(v_dir):
+                os.makedirs(v_dir, 0o700)
+    except OSError as e:
+        logger.warning("Unable to create the template cache: '{}'".format(e))
+        return jinja2.Environment(loader=templateLoader)
+
+    bytecodeCache = jinja2.FileSystemBytecodeCache(v_bytecodedir)
+    templateEnv = jinja2.Environment(loader=templateLoader, bytecode_cache=bytecodeCache)
+
+    # The stamp has the jinja2 / python version and the time of the latest template change,
+    # the templates are only compiled again if it differs from the stamp saved by the last compile
+
+    l_templates = templateEnv.list_templates(filter_func=lambda name: name == v_TemplateFile)
+    v_stamp = "{0} {1} {2}".format(jinja2.__version__, sys.version_info[0], max(
+        [os.path.getmtime(os.path.join(v_TemplateDir, name)) for name in l_templates] or [0]
+    ))
+    v_stampfile = os.path.join(v_moduledir, "templates.stamp")
+    try:
+        if not os.path.exists(v_stampfile) or open(v_stampfile).read() != v_stamp:
+            logger.debug("Precompiling the templates: '{0}' to: '{1}'".format(l_templates, v_moduledir))
+            templateEnv.compile_templates(v_moduledir, filter_func=lambda name: name in l_templates,
+                                          zip=None, ignore_errors=False)
+            fob = open(v_stampfile, 'w')
+            fob.write(v_stamp)
+            fob.close()
+    except (IOError, OSError, jinja2.TemplateError) as e:
+        logger.warning("Unable to precompile the templates, using the template files: '{}'".format(e))
+        return templateEnv
+
+    return jinja2.Environment(
+            loader=jinja2.ChoiceLoader([jinja2.ModuleLoader(v_moduledir), templateLoader]),
+            bytecode_cache=bytecodeCache
+    )
+
+
+# Function : fn_write_to_file(l_chunks)
+# The below function get the HTML from main() and write to a file piece by piece as it is rendered
 # The HTML tag is created by jinja2 framework
 
 
-def fn_write_to_file(data):
+def fn_write_to_file(l_chunks):
     filename = 'new-article-list.html'
     logger.debug("Saving the html comtent to file: '{}'".format(filename))
     fob = open(filename, 'w')
-    # Used "encode" hack to avoid the error from the trademark symbol used by the categories section
-    #              "UnicodeEncodeError: 'ascii' codec can't encode character u'\xae' in position"
-    fob.write(data.encode('ascii', 'ignore'))
+    for chunk in l_chunks:
+        # Used "encode" hack to avoid the error from the trademark symbol used by the categories section
+        #              "UnicodeEncodeError: 'ascii' codec can't encode character u'\xae' in position"
+        fob.write(chunk.encode('ascii', 'ignore').decode('ascii'))
     fob.close()
+    return filename
 
 
-# Function : fn_send_email(html)
+# Function : fn_send_email(html, v_period)
 # The below function get the data from main() and send email to the receipt's
+# "v_period" is the period checked for the subject ( eg.s "past 8 day" or "since the last run" )
 
 
-def fn_send_email(html):
+def fn_send_email(html, v_period):
 
     # Sender and receiver email address
 
@@ -144,7 +381,7 @@ def fn_send_email(html):
     # Create message container - the correct MIME type is multipart/alternative.
 
     msg = MIMEMultipart('alternative')
-    msg['Subject'] = "New articles published / updated past " + str(v_CheckDays) + " day"
+    msg['Subject'] = "New articles published / updated " + v_period
     msg['From'] = me
     msg['To'] = ", ".join(you)
 
@@ -185,9 +422,35 @@ d_zdapi = {
     "categories" : v_top_level_url + "/api/v2/help_center/en-us/categories.json",
     "sub_catergories" : v_top_level_url + "/api/v2/help_center/categories/{id}/articles.json",
     "sections" : v_top_level_url + "/api/v2/help_center/sections.json",
+    "incremental_articles" : v_top_level_url + "/api/v2/help_center/incremental/articles.json",
+    "translations" : v_top_level_url + "/api/v2/help_center/articles/{id}/translations.json",
     "sub_sections": v_top_level_url + "api/v2/help_center/sections/{id}/articles.json"
 }
 
+# The only fields of the articles / translations API that are used by the report, the rest of the fields
+# ( mainly the article "body" ) are dropped while the json is parsed. The pagination fields are kept as well.
+
+l_ArticleFields = set([
+    "articles", "translations", "next_page", "page_count",
+    "id", "name", "html_url", "author_id", "section_id", "draft", "created_at", "updated_at", "updated_by_id",
+    "locale"
+])
+
+# The articles, users, categories and sections are kept as compact records ( tuples ) with only the
+# fields used by the report, they are built once by fn_make_record() when the API data is read.
+
+Article = namedtuple('Article', [
+    'id', 'name', 'html_url', 'author_id', 'section_id', 'draft',
+    'category_id', 'category_name', 'created_at', 'updated_at', 'updated_by_id'
+])
+Category = namedtuple('Category', ['id', 'name', 'updated_at'])
+Section = namedtuple('Section', ['id', 'name', 'category_id', 'updated_at'])
+
+# The locale, updated_at and updated_by_id of the translations of an article, saved on the snapshot store
+# with the updated_at of the article so that they are only requested again when the article changes.
+
+Translations = namedtuple('Translations', ['id', 'updated_at', 'translations'])
+
 
 # Step 2:
 # Get the categories ID of the products that we are interested
@@ -216,58 +479,47 @@ l_CategoryNames = [
 
 # Step 3:
 # Function : fn_UserInfo
-# This function loops into the Zendesk API to find all the users list that are agents.
-# We then store all those users dictionary on a single list
+# This function loops into the Zendesk API to find all the users list ( or only the agents ).
+# We then store the users on the user cache, so that the creator / updater name of the articles
+# can be looked up directly with its id. When v_UserResolution is "ids" nothing is pulled here,
+# the users are requested by fn_get_user() when the report needs them.
 
 def fn_UserInfo():
 
-    # Local variables
-
-    l_users = []
-    v_currentpage = 1
-    logger.debug("User list current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
+    if v_UserResolution == "ids":
+        return
 
     # Get the API for categories from the d_zdapi mentioned above
 
     v_pageurl = d_zdapi['users']
+    if v_UserResolution == "agents":
+        v_pageurl = fn_add_query(v_pageurl, "role=agent")
     logger.debug("Users URL: '{}'".format(v_pageurl))
 
-    # The URL changes on every page , the below parameter makes those adjustment
-
-    v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-    logger.info("Reading Users list URL: '{}'".format(v_pageurlincrement))
-
-    # Loop till we reach the end of the page.
-
-    while v_pageurlincrement != None:
+    # Loop till we reach the end of the page, the users list uses the cursor pagination.
+    # ( the listing rarely changes, so it is cached )
 
-        # Get the data from the url page
+    for data in fn_iter_pages(v_pageurl, cache=True, cursor=True):
 
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
         # print (fn_json_formatter((data)))
 
         # Loop through the data obtained from the API and get the user information.
 
-        for d_users in data['users']:
-            l_users.append(d_users)
-            logger.debug("List of Users: '{}'".format("user_name: " + d_users['name'].encode('ascii', 'ignore')))
-            logger.debug("List of Users: '{}'".format("user_id: " + str(d_users['id'])))
+        l_users = [fn_make_record(User, d_user) for d_user in data['users']]
 
-        # Increment page
+        for user in l_users:
+            logger.debug("List of Users: '{}'".format("user_name: " + user.name.encode('ascii', 'ignore')))
+            logger.debug("List of Users: '{}'".format("user_id: " + str(user.id)))
 
-        v_pageurlincrement = data['next_page']
-        logger.info("Reading User list URL: '{}'".format(v_pageurlincrement))
+        # Save the users on the user cache and the snapshot store
 
-    # Return the list to be used by the rest of the program
-
-    return l_users
+        fn_user_cache_put(l_users)
+        fn_store_upsert('users', l_users)
 
 # Step 4:
 # Function : get_categories_id
 # This function loops into the Zendesk API to find the categories ID for product that is of interest
-# We then store all those categories dictionary on a single list
+# We then store all those categories on a single list
 
 
 def fn_get_categories_id():
@@ -275,146 +527,296 @@ def fn_get_categories_id():
     # Local variables
 
     l_categories = []
-    v_currentpage = 1
-    logger.debug("Categories current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
 
     # Get the API for categories from the d_zdapi mentioned above
 
     v_pageurl = d_zdapi['categories']
     logger.debug("Categories URL: '{}'".format(v_pageurl))
 
-    # Get the max number of pages on the URL, so that we can crawl till the end of the page.
-
-    v_maxpage = fn_get_page_count(v_pageurl)
-    logger.info("Categories max pages: '{}'".format(v_maxpage))
-
-    # Loop till we reach the end of the page.
-
-    while v_currentpage <= v_maxpage:
-
-        # The URL changes on every page , the below parameter makes those adjustment
+    # Loop till we reach the end of the page ( the listing rarely changes, so it is cached )
 
-        v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-        logger.info("Reading Categories URL: '{}'".format(v_pageurlincrement))
+    for data in fn_iter_pages(v_pageurl, cache=True):
 
-        # Get the data from the url page
-
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
         # print (fn_json_formatter((data)))
 
         # Loop through the data obtained from the API
         # and just pick the information we are interested set by l_CategoryNames and append it to the list
-        # we delete descriptions to avoid unnecessary usage of memory due to its content.
 
         for d_categories in data['categories']:
             if d_categories['name'] not in l_CategoryNames:
-                del d_categories['description']
-                l_categories.append(d_categories)
+                l_categories.append(fn_make_record(Category, d_categories))
                 logger.debug("List of categories: '{}'".format("category_name: " + d_categories['name'].encode('ascii', 'ignore')))
                 logger.debug("List of categories: '{}'".format("category_id: " + str(d_categories['id'])))
 
-        # Increment page
+    # Save the categories on the snapshot store
 
-        v_currentpage += 1
-        logger.debug("Incremented categories pages count: '{}'".format(v_currentpage))
+    fn_store_upsert('categories', l_categories)
 
     # Return the list to be used by the program fn_get_articles_info()
 
     return l_categories
 
 
-# Step 5:
-# Function : fn_get_articles_info(categories_id,categories_name)
-# It uses the category ID that was provided by fn_get_categories_id()
-# and then pulls the articles all of them on those categories and then stores it onto the list
+# Function : fn_normalize_article(d_articles, categories_id, categories_name)
+# We build the Article record from the article dictionary, adding the category_id and category_name
+# so that its easy to divide by section, pick the updater's id and also changes the date
+# from JSON format to more readable format. The article dictionary must have its "translations" list.
+# ( the creator's and updater's name are looked up by the template with fn_user_name() )
 
 
-def fn_get_articles_info(categories_id, categories_name, l_users):
+def fn_normalize_article(d_articles, categories_id, categories_name):
+    d_articles['category_id'] = categories_id
+    d_articles['category_name'] = categories_name
+    d_articles['updated_by_id'] = None
 
-    # Local Variables
+    # NOTE: Zendesk JSON has two "updated_at" field, the main updated_at is the time when the metadata
+    # was updated (which is of no interest to us) and other inside translation dictionary tells
+    # when the documents was changed or re-translated from original content which makes more sense.
+    # The latest change of all the translations ( of v_Locales ) is the updated time of the article.
 
-    l_articles = []
-    v_currentpage = 1
-    logger.debug("Sub categories current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
+    l_translations = [
+        v_translations for v_translations in d_articles['translations']
+        if v_Locales is None or v_translations['locale'] in v_Locales
+    ]
+    if l_translations:
+        v_translations = max(l_translations, key=lambda v_translations: fn_parse_time(v_translations['updated_at']))
+        d_articles['updated_at'] = v_translations['updated_at']
+        # d_articles['author_id'] = v_translations['created_by_id']
+        d_articles['updated_by_id'] = v_translations['updated_by_id']
+
+    article = fn_make_record(Article, d_articles)
+    logger.debug("List of sub categories: '{}'".format("category_name: " + article.category_name.encode('ascii', 'ignore')))
+    logger.debug("List of sub categories: '{}'".format("category_id: " + str(article.category_id)))
+    logger.debug("List of sub categories: '{}'".format("article_name: " + article.name.encode('ascii', 'ignore')))
+    logger.debug("List of sub categories: '{}'".format("article_url: " + article.html_url))
+    logger.debug("List of sub categories: '{}'".format("article_created: " + str(article.created_at)))
+    logger.debug("List of sub categories: '{}'".format("article_updated: " + str(article.updated_at)))
+
+    return article
+
+
+# Function : fn_add_translations(l_darticles, v_sincedate)
+# Add the "translations" list ( locale, updated_at & updated_by_id of v_Locales ) to the article dictionaries.
+# The article updated_at changes with its translations, so only the translations of the articles updated
+# after "v_sincedate" are requested, unless they are already on the snapshot store for the same updated_at.
+
+
+def fn_add_translations(l_darticles, v_sincedate):
+
+    # Local variables
+
+    l_fetcharticles = []
+    d_stored = fn_store_get('translations', Translations, [d_articles['id'] for d_articles in l_darticles])
+
+    for d_articles in l_darticles:
+        stored = d_stored.get(d_articles['id'])
+        v_updatedtime = fn_parse_time(d_articles['updated_at'])
+        if stored is not None and stored.updated_at == v_updatedtime:
+            d_articles['translations'] = stored.translations
+        elif v_updatedtime > v_sincedate:
+            l_fetcharticles.append(d_articles)
+        else:
+            d_articles['translations'] = stored.translations if stored is not None else []
+
+    logger.debug("Translations requested for '{0}' of '{1}' articles".format(len(l_fetcharticles), len(l_darticles)))
+
+    # Get the translations of the locales v_Locales in parallel, save them on the snapshot store
+
+    l_translationurls = [d_zdapi['translations'].format(id=str(d_articles['id'])) for d_articles in l_fetcharticles]
+    if v_Locales is not None:
+        l_translationurls = [fn_add_query(v_url, "locales=" + ",".join(v_Locales)) for v_url in l_translationurls]
+
+    l_translations = []
+    for d_articles, data in zip(l_fetcharticles, fn_get_pages(l_translationurls, fields=l_ArticleFields)):
+        d_articles['translations'] = [
+            {
+                'locale': v_translations['locale'],
+                'updated_at': v_translations['updated_at'],
+                'updated_by_id': v_translations['updated_by_id']
+            }
+            for v_translations in data['translations']
+            if v_Locales is None or v_translations['locale'] in v_Locales
+        ]
+        l_translations.append(fn_make_record(Translations, d_articles))
+
+    fn_store_upsert('translations', l_translations)
+
+
+# Step 5:
+# Function : fn_get_articles_info(categories_id, categories_name, v_lastweekdate)
+# It uses the category ID that was provided by fn_get_categories_id()
+# and then pulls the articles all of them on those categories, the articles are yielded one by one
+# as the pages arrive so that the whole category is never held in memory.
+
+
+def fn_get_articles_info(categories_id, categories_name, v_lastweekdate):
 
     # Get the API for sub categories from the d_zdapi mentioned above
     # Including the translation to obtain the actual updated time rather than metadata updated date.
+    # ( with v_Locales the translations of the locales are requested by fn_add_translations() )
 
-    v_pageurl = d_zdapi['sub_catergories'].format(id=str(categories_id)) + "?include=translations"
+    v_pageurl = d_zdapi['sub_catergories'].format(id=str(categories_id))
+    if v_Locales is None:
+        v_pageurl = v_pageurl + "?include=translations"
     logger.debug("Sub categories page url: '{}'".format(v_pageurl))
 
-    # Get the max number of pages on the URL, so that we can crawl till the end of the page.
+    # Loop till we reach the end of the page.
+    # After the first page, the rest of the pages are fetched in parallel ( the order of the pages is preserved )
 
-    v_maxpage = fn_get_page_count(v_pageurl)
-    logger.info("Sub categories max pages: '{}'".format(v_maxpage))
+    for data in fn_iter_pages(v_pageurl, fields=l_ArticleFields):
+
+        # print (fn_json_formatter((data)))
+
+        # Loop through the data obtained from the API
+        # We normalize the articles of the page, save them on the snapshot store and pass them on.
+
+        if v_Locales is not None:
+            fn_add_translations(data['articles'], v_lastweekdate)
+
+        l_articles = [fn_normalize_article(d_articles, categories_id, categories_name) for d_articles in data['articles']]
+
+        fn_store_upsert('articles', l_articles)
+
+        for article in l_articles:
+            yield article
+
+
+# Function : fn_filter_updated(l_articles, v_lastweekdate)
+# Passes on only the articles that was published / updated after "v_lastweekdate"
+# Their creator and updater are marked to be requested together when the template needs the first name.
+
+
+def fn_filter_updated(l_articles, v_lastweekdate):
+    for article in l_articles:
+        if article.updated_at > v_lastweekdate:
+            logger.debug("List of last week article: '{}'".format("category_name: " + article.category_name.encode('ascii', 'ignore')))
+            logger.debug("List of last week article: '{}'".format("category_id: " + str(article.category_id)))
+            logger.debug("List of last week article: '{}'".format("article_name: " + article.name.encode('ascii', 'ignore')))
+            logger.debug("List of last week article: '{}'".format("article_url: " + article.html_url))
+            logger.debug("List of last week article: '{}'".format("article_created: " + str(article.created_at)))
+            logger.debug("List of last week article: '{}'".format("article_updated: " + str(article.updated_at)))
+            fn_user_want([article.author_id, article.updated_by_id])
+            yield article
+
+
+# Function : fn_get_category_articles(category, v_lastweekdate)
+# Pulls all the articles of a single category and keeps only the one published / updated after "v_lastweekdate",
+# this is run in parallel for all the categories by main()
+
+
+def fn_get_category_articles(category, v_lastweekdate):
+    logger.info("Pull data for category: '{}'".format(category.name.encode('ascii', 'ignore')))
+
+    l_articles = list(fn_filter_updated(
+            fn_get_articles_info(
+                    category.id,
+                    category.name,
+                    v_lastweekdate
+            ),
+            v_lastweekdate
+    ))
+
+    logger.debug("End pulling data from category: '{}'".format(category.name.encode('ascii', 'ignore')))
+
+    return l_articles
+
+
+# Function : fn_read_cursor() & fn_write_cursor(v_cursor)
+# Read / Save the time ( seconds since epoch ) of the last incremental run from / to the v_CursorFile
+# fn_read_cursor() returns None when there was no previous run.
+
+
+def fn_read_cursor():
+    if not os.path.exists(v_CursorFile):
+        return None
+    fob = open(v_CursorFile, 'r')
+    v_cursor = int(fob.read().strip())
+    fob.close()
+    logger.debug("Incremental cursor read from file '{0}': '{1}'".format(v_CursorFile, v_cursor))
+    return v_cursor
+
+
+def fn_write_cursor(v_cursor):
+    logger.debug("Incremental cursor saved to file '{0}': '{1}'".format(v_CursorFile, v_cursor))
+    fob = open(v_CursorFile, 'w')
+    fob.write(str(v_cursor))
+    fob.close()
 
-    # Loop till we reach the end of the page.
 
-    while v_currentpage <= v_maxpage:
+# Function : fn_get_section_categories()
+# Get the category id of all the sections, the incremental API only tells the section of the article.
 
-        # The URL changes on every page , the below parameter makes those adjustment
 
-        v_pageurlincrement = v_pageurl + "&page=" + str(v_currentpage)
-        logger.info("Reading Sub categories URL: '{}'".format(v_pageurlincrement))
+def fn_get_section_categories():
+    d_sectioncategory = {}
 
-        # Get the data from the url page
+    for data in fn_iter_pages(d_zdapi['sections'], cache=True):
+        l_sections = [fn_make_record(Section, d_sections) for d_sections in data['sections']]
+        for section in l_sections:
+            d_sectioncategory[section.id] = section.category_id
+        fn_store_upsert('sections', l_sections)
 
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
+    return d_sectioncategory
+
+
+# Function : fn_get_incremental_articles(l_categories, v_starttime)
+# Pulls only the articles that has been changed since "v_starttime" ( seconds since epoch ) using
+# the help center incremental API, and keeps the one under the categories obtained by fn_get_categories_id().
+# The translations are then requested only for those articles to get the actual updated time ( fn_add_translations() ).
+# The normalized articles are yielded one by one like fn_get_articles_info().
+
+
+def fn_get_incremental_articles(l_categories, v_starttime):
+
+    # Local Variables
+
+    l_changedarticles = []
+    d_seenids = set()
+    d_categorynames = dict((category.id, category.name) for category in l_categories)
+    d_sectioncategory = fn_get_section_categories()
+
+    # Loop till the incremental API has no more pages
+
+    v_pageurlincrement = d_zdapi['incremental_articles'] + "?start_time=" + str(v_starttime)
+
+    while v_pageurlincrement != None:
+
+        data = fn_get_page(v_pageurlincrement, fields=l_ArticleFields)
         # print (fn_json_formatter((data)))
 
-        # Loop through the data obtained from the API
-        # We append all the dictionary information onto a list, during this process we add
-        # the category_id and category_name also to the list so that its easy to divide by section,
-        # and also changes the date from JSON format to more readable format.
+        # The next page starts at the end time of this one, the articles of that second come again
 
         for d_articles in data['articles']:
-            d_articles['category_id'] = categories_id
-            d_articles['category_name'] = categories_name
-            v_createdid = d_articles['author_id']
-            v_modifycreatetime = dateutil.parser.parse(d_articles['created_at'])
-
-            # NOTE: Zendesk JSON has two "updated_at" field, the main updated_at is the time when the metadata
-            # was updated (which is of no interest to us) and other inside translation dictionary tells
-            # when the documents was changed or re-translated from original content which makes more sense.
-
-            for v_translations in d_articles['translations']:
-                v_modifyupdatetime = dateutil.parser.parse(v_translations['updated_at'])
-                # v_createdid = v_translations['created_by_id']
-                v_updatedid = v_translations['updated_by_id']
-                del v_translations['body']
-
-                # Now loop through the users list and get the creator and updater username
-                # Have mapping its id.
-
-                for users in l_users:
-                    if v_createdid == users['id']:
-                        d_articles['creator'] = users['name']
-                    if v_updatedid == users['id']:
-                        d_articles['updater'] = users['name']
-
-            del d_articles['body']
-            d_articles['created_at'] = str(v_modifycreatetime)
-            d_articles['updated_at'] = str(v_modifyupdatetime)
-            l_articles.append(d_articles)
-            logger.debug("List of sub categories: '{}'".format("category_name: " + d_articles['category_name'].encode('ascii', 'ignore')))
-            logger.debug("List of sub categories: '{}'".format("category_id: " + str(d_articles['category_id'])))
-            logger.debug("List of sub categories: '{}'".format("article_name: " + d_articles['name'].encode('ascii', 'ignore')))
-            logger.debug("List of sub categories: '{}'".format("article_url: " + d_articles['html_url']))
-            logger.debug("List of sub categories: '{}'".format("article_created: " + str(d_articles['created_at'])))
-            logger.debug("List of sub categories: '{}'".format("article_updated: " + str(d_articles['updated_at'])))
-
-        # Increment page
-
-        v_currentpage += 1
-        logger.debug("Incremented sub categories pages count: '{}'".format(v_currentpage))
-
-    # Return the list to be used by rest of the program in the main() block
+            v_categoryid = d_sectioncategory.get(d_articles['section_id'])
+            if v_categoryid in d_categorynames and d_articles['id'] not in d_seenids:
+                d_seenids.add(d_articles['id'])
+                l_changedarticles.append(d_articles)
 
-    return l_articles
+        # Stop when the page is empty, else move to the next page
+
+        if not data['articles'] or data['next_page'] == v_pageurlincrement:
+            v_pageurlincrement = None
+        else:
+            v_pageurlincrement = data['next_page']
+
+    logger.info("Total articles changed since '{0}': '{1}'".format(v_starttime, len(l_changedarticles)))
+
+    # Get the translations of the changed articles in parallel and normalize them like fn_get_articles_info()
+
+    fn_add_translations(l_changedarticles, datetime.datetime.min)
+
+    l_articles = []
+
+    for d_articles in l_changedarticles:
+        v_categoryid = d_sectioncategory[d_articles['section_id']]
+        l_articles.append(fn_normalize_article(d_articles, v_categoryid, d_categorynames[v_categoryid]))
+
+    # Save all the changed articles on the store in a single transaction
+
+    fn_store_upsert('articles', l_articles)
+
+    for article in l_articles:
+        yield article
 
 
 # Step 6:
@@ -429,24 +831,30 @@ def main():
 
     logger.info("Start of the program: '{}'".format(__file__))
 
-    # Local parameters that is used by this function
-
-    l_articles = []
-    l_updatedarticles = []
-
     # Obtain the current and last week date & time
 
+    v_runstarttime = int(time.time())
     v_currenttime = datetime.datetime.now()
     v_lastweekdate = (v_currenttime - timedelta(days=v_CheckDays))
     logger.debug("Days(past) report requested: '{}'".format(v_CheckDays))
     logger.info("Get Current date & time: '{}'".format(v_currenttime))
     logger.info("Get LastWeek date & time: '{}'".format(v_lastweekdate))
 
+    # Pass the parameters on to the API client, then set up the connection pool and the compression of the API session
+
+    fn_configure(globals())
+    fn_transport_setup()
+
+    # Open the snapshot store, the data pulled below are saved there
+
+    fn_store_open()
+
     # Call the function to obtain the category ID's
 
     logger.info("Start of the function to gather all the agent information")
 
-    l_users = fn_UserInfo()
+    fn_user_cache_load()
+    fn_UserInfo()
 
     logger.debug("End of the function to gather all the agent information")
 
@@ -459,96 +867,98 @@ def main():
     logger.debug("End of the function to gather the categories ID")
 
     # Call the function fn_get_articles_info() to obtain the updated articles in the category obtained above
-    # Also map the creator's and updaters name with each article.
-
-    logger.info("Start of the function to gather the articles in category")
-
-    for d_category_id in d_categoryfinal:
-        logger.info("Pull data for category: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
-
-        l_articles += fn_get_articles_info(
-                d_category_id['id'],
-                d_category_id['name'],
-                l_users
+    # The creator's and updaters name are looked up later by the template.
+    # The articles flow through fetch -> normalize -> filter one by one, only the articles
+    # published / updated in last week are held in memory.
+
+    # In incremental mode only pull the articles changed since the last run ( or the last v_CheckDays )
+    # else the categories are pulled in parallel ( at most v_MaxCategoryWorkers at a time )
+    # and the results are merged back in the same order as the categories list.
+
+    logger.info("Start of the function to gather the articles published / updated in last week")
+
+    # The period checked, in incremental mode it starts at the last run when there was one
+
+    v_periodstart = v_lastweekdate
+    v_period = "past " + str(v_CheckDays) + " day"
+
+    if v_IncrementalMode:
+        v_starttime = int(time.mktime(v_lastweekdate.timetuple()))
+        v_cursor = fn_read_cursor()
+        if v_cursor is not None and v_cursor > v_starttime:
+            v_starttime = v_cursor
+            v_periodstart = datetime.datetime.fromtimestamp(v_cursor)
+            v_period = "since the last run"
+        logger.info("Incremental mode, get articles changed since: '{}'".format(v_starttime))
+        l_updatedarticles = fn_filter_updated(
+                fn_get_incremental_articles(d_categoryfinal, v_starttime),
+                v_lastweekdate
         )
+    else:
+        l_updatedarticles = itertools.chain.from_iterable(fn_parallel_map(
+                lambda category: fn_get_category_articles(category, v_lastweekdate),
+                d_categoryfinal,
+                v_MaxCategoryWorkers
+        ))
 
-        logger.debug("End pulling data from category: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
+    # Sort the article list so that we can divide the article into section by Jinja2 Framework
 
-    logger.debug("End of the function to gather the articles in category")
+    logger.debug("Sorting articles based on category")
+    l_sortedarticles = sorted(l_updatedarticles, key=attrgetter('category_name'))
 
-    # Change the time from JSON time format to much more readable and obtain the last week articles.
+    logger.debug("End of the function to gather the articles published / updated in last week")
 
-    logger.info("Selecting articles that was published / updated in last week")
+    # Check if there is content or not before rendering, if no articles are published / updated
+    # send the no content email without any template work
 
-    for d_article in l_articles:
-        if datetime.datetime.strptime(d_article['updated_at'][:19],'%Y-%m-%d %H:%M:%S') > v_lastweekdate:
-            l_updatedarticles.append(d_article)
-            logger.debug("List of last week article: '{}'".format("category_name: " + d_article['category_name'].encode('ascii', 'ignore')))
-            logger.debug("List of last week article: '{}'".format("category_id: " + str(d_article['category_id'])))
-            logger.debug("List of last week article: '{}'".format("article_name: " + d_article['name'].encode('ascii', 'ignore')))
-            logger.debug("List of last week article: '{}'".format("article_url: " + d_article['html_url']))
-            logger.debug("List of last week article: '{}'".format("article_created: " + str(d_article['created_at'])))
-            logger.debug("List of last week article: '{}'".format("article_updated: " + str(d_article['updated_at'])))
+    if not l_sortedarticles:
 
-    logger.debug("Finished selecting articles that was published / updated in last week")
+        # No content, send the below html code as email and write it to a file to debug or audit if any issues
 
-    # Sort the article list so that we can divide the article into section by Jinja2 Framework
+        logger.info("No articles published / updated {}".format(v_period))
+        html = v_NoContentHTML.format(v_periodstart, v_currenttime, v_period)
+        fn_write_to_file([html])
+        fn_send_email(html, v_period)
 
-    logger.debug("Sorting articles based on category")
-    l_sortedarticles = sorted(l_updatedarticles, key=itemgetter('category_name'))
-
-    # The below set of line is to use jinja2 framework
-    # The sorted list obtained above is changed into HTML tags and written to a file
-    # The template used by the framework is "articles.html"
+    else:
 
-    logger.info("Creating HTML tags for the information gathered")
+        # The below set of line is to use jinja2 framework
+        # The sorted list obtained above is changed into HTML tags and written to a file
+        # The template used by the framework is "articles.html"
 
-    templateLoader = jinja2.FileSystemLoader(searchpath="./")
-    templateEnv = jinja2.Environment(loader=templateLoader)
-    templateFile = "articles.html"
-    template = templateEnv.get_template(templateFile)
-    v_outputtext = template.render({
-        'articles': l_sortedarticles,
-        'v_current_time': v_currenttime,
-        'v_last_week_date': v_lastweekdate
-    })
+        logger.info("Creating HTML tags for the information gathered")
 
-    # Write all the information on to a file to debug or audit if any issues
+        # The template is rendered piece by piece ( template.generate ) straight on to the file,
+        # write all the information on to a file to debug or audit if any issues
 
-    fn_write_to_file(v_outputtext)
+        template = fn_get_template(v_TemplateFile)
+        v_outputfile = fn_write_to_file(template.generate({
+            'articles': l_sortedarticles,
+            'v_current_time': v_currenttime,
+            'v_last_week_date': v_periodstart,
+            'user_name': fn_user_name
+        }))
 
-    # Sending email
-    # Check if there is content or not before sending email
-    # The values of 67 was obtained after checking total words without content under "v_outputtext"
+        # Content available, send the content as email, the email body is read from the file written above
 
-    logger.debug("Checking the content exists: '{}'".format(len(v_outputtext.split())))
-    if len(v_outputtext.split()) <= 67:
+        fob = open(v_outputfile)
+        v_outputtext = fob.read()
+        fob.close()
 
-        # No content, send the below html code as email
+        fn_send_email(v_outputtext, v_period)
 
-        html = str("""\
-        <html>
-        <head></head>
-        <h2 align="center"><font face="verdana"> """ +
-           ("Article published / updated from \"{0}\" to \"{1}\" </font></h2>".format(v_lastweekdate,v_currenttime)) +
-        """<body>
-        <p></p>
-        <p><font face="verdana"> No new articles published / updated past """ + str(v_CheckDays) + """ day.
-        </font></p>
-        <p></p>
-        </body>
-        </html>
-        """)
+    # Save the user cache for the next run
 
-        fn_send_email(html)
+    fn_user_cache_save()
 
-    else:
+    # Save the start time of this run, so that the next incremental run starts from here
 
-        # Content available, send the content as email
+    if v_IncrementalMode:
+        fn_write_cursor(v_runstarttime)
 
-        fn_send_email(v_outputtext)
+    # Log the bytes transferred from the API
 
-    # Start program message
+    fn_transfer_report()
 
     logger.info("End of the program: '{}'".format(__file__))
 
@@ -29,24 +29,58 @@
 # For Python 2.6, IPython fails when installing with pip
 # Install manually using "https://ipython.org/ipython-doc/2/install/install.html"
 
-import requests
 import json
-import dateutil.parser
 import datetime
 import logging
 from operator import itemgetter
+from collections import namedtuple
 from dateutil.relativedelta import relativedelta
 import base64
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.mime.image import MIMEImage
 import collections
 import sys, getopt
+import os
+import errno
+import time
+import multiprocessing
+import array
 import plotly.plotly as py
 import plotly.graph_objs as go
 from plotly.graph_objs import *
 from IPython.display import display, HTML
 
+# numpy is optional, when installed the metrics of the graphs are calculated on columns ( see v_ColumnarBackend )
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# matplotlib is optional, its only needed to draw the graphs locally ( see v_RenderBackend )
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+# The ZenDesk API client shared with the other program is on the folder "Zendesk-Knowledge-Base-Client"
+# next to the folder of this program
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Zendesk-Knowledge-Base-Client"))
+import zendesk_kb_client
+from zendesk_kb_client import (
+    fn_add_query, fn_configure, fn_fetch_engine_stop, fn_get_page, fn_get_user, fn_iter_pages, fn_make_record,
+    fn_parallel_map, fn_store_get_cursor, fn_store_load, fn_store_open, fn_store_set_cursor, fn_store_upsert,
+    fn_transfer_report, fn_transport_setup, fn_user_cache_load, fn_user_cache_put, fn_user_cache_save,
+    fn_user_want, User
+)
+
+
 # Global parameters
 
 # Set up a logging process
@@ -89,12 +123,122 @@ username = "username"
 password = "password"
 
 
-# Authenticate the username / password here and set it globally
-# This authentications is used by the functions fn_get_categories_id() & fn_get_articles_info()
+# The username / password are set on the API session of the client by fn_configure() ( see main() )
+
+# Parameters : v_MaxWorkers
+# This parameter is used by fn_get_pages()
+# This is the maximum number of pages that are requested from the API at the same time.
+
+v_MaxWorkers = 8
+
+# Parameters : v_MaxCategoryWorkers
+# This parameter is used by main()
+# This is the maximum number of categories whose articles / sections are pulled at the same time.
+
+v_MaxCategoryWorkers = 4
+
+# Parameters : v_PageSize
+# This parameter is used by fn_iter_pages()
+# This is the number of records requested on every page of the API ( the API allows at most 100 ).
+
+v_PageSize = 100
+
+# Parameters : v_RateLimit, v_BucketSize, v_MaxRetries & v_MaxConcurrentRequests
+# This parameter is used by fn_get_page()
+# v_RateLimit is the API requests per minute allowed for the account ( updated from the X-Rate-Limit header ),
+# the requests are paced with a token bucket ( of v_BucketSize requests ) so that we don't go above it. When the API still sends
+# "429 Too Many Requests" the request is retried ( at most v_MaxRetries times ) after its Retry-After time.
+# The number of requests sent at the same time is raised ( up to v_MaxConcurrentRequests ) while the
+# X-Rate-Limit-Remaining shows enough quota left, and lowered when the quota is running out.
+
+v_RateLimit = 700
+v_BucketSize = 10
+v_MaxRetries = 5
+v_MaxConcurrentRequests = v_MaxWorkers * v_MaxCategoryWorkers
+
+# Parameters : v_FetchConcurrency
+# This parameter is used by fn_get_page_async()
+# All the pages requested in parallel ( fn_get_pages() ) are run on one fetch engine shared by the whole program,
+# a pool of v_FetchConcurrency threads that keep their connections to the API open and reuse them for the next page.
+
+v_FetchConcurrency = v_MaxConcurrentRequests
+
+# Parameters : v_PoolMaxSize, v_PoolBlock & v_AcceptEncoding
+# This parameter is used by fn_transport_setup()
+# v_PoolMaxSize is the number of keep-alive connections kept open to the API, one for every thread that calls the API
+# ( the fetch engine and the category threads ). With v_PoolBlock a thread waits for a free connection instead of
+# opening one more. The responses are requested compressed with v_AcceptEncoding ( "br" only when brotli is installed ).
+
+v_PoolMaxSize = v_FetchConcurrency + v_MaxCategoryWorkers
+v_PoolBlock = False
+v_AcceptEncoding = zendesk_kb_client.v_AcceptEncoding
+
+# Parameters : v_StreamChunkSize
+# This parameter is used by fn_stream_content()
+# The article pages are read and parsed v_StreamChunkSize bytes at a time ( see fn_json_stream() ).
+
+v_StreamChunkSize = 65536
+
+# Parameters : v_SnapshotStore
+# This parameter is used by the fn_store_* functions
+# Path of the SQLite file where the articles, users, categories and sections are saved ( keyed by id ),
+# the same file can be shared with the alerts program. Set to None to turn off the snapshot store.
+# When turned on, only the articles changed since the last run are pulled from the help center incremental API
+# eg.s v_SnapshotStore = os.path.expanduser("~/zendesk-kb-snapshot.db")
+
+v_SnapshotStore = None
+
+# Parameters : v_CacheDir, v_CacheTTL & v_CacheMaxEntries
+# This parameter is used by fn_get_page()
+# The users, categories and sections listing rarely change, so their responses are saved on v_CacheDir.
+# A response younger than v_CacheTTL seconds is used without calling the API, an older one is checked with the
+# API using its ETag / Last-Modified ( unchanged pages come back as "304 Not Modified" without any content ).
+# Only the v_CacheMaxEntries most recently used responses are kept. Set v_CacheDir to None to turn off the cache.
+# The users listing has the names and emails of the users, the folder and the files are only readable by the owner.
+# eg.s v_CacheDir = os.path.expanduser("~/.zendesk-kb-cache")
+
+v_CacheDir = None
+v_CacheTTL = 3600
+v_CacheMaxEntries = 1000
 
+# Parameters : v_UserResolution, v_UserCacheFile, v_UserCacheTTL & v_UserCacheMaxEntries
+# This parameter is used by fn_UserInfo() & fn_get_user()
+# How the agents ( authors ) of the graphs are found
+#       "ids"    : the authors are requested when the graphs first need their name ( 100 at a time using show_many )
+#       "agents" : all the agents of the account are pulled first ( role=agent ), the rest as "ids"
+# The v_UserCacheMaxEntries most recently used users are kept on the user cache, which is saved on
+# v_UserCacheFile for the next run. A saved user is used for v_UserCacheTTL seconds,
+# set v_UserCacheFile to None to not save the user cache.
 
-zd = requests.session()
-zd.auth = (username, password)
+v_UserResolution = "ids"
+v_UserCacheFile = os.path.expanduser("~/.zendesk-kb-cache/users/users-by-id.json")
+v_UserCacheTTL = 86400
+v_UserCacheMaxEntries = 10000
+
+# Parameters : v_ColumnarBackend
+# This parameter is used by main()
+# When numpy is installed the articles are changed to columns and the metrics of the graphs are calculated
+# with numpy ( see fn_aggregate_columns() ), this is much faster on large help centers.
+# Set to False ( or don't install numpy ) to calculate them with the plain python loop of fn_aggregate_articles().
+
+v_ColumnarBackend = True
+
+# Parameters : v_RenderBackend, v_ChartDir & v_ChartFormat
+# This parameter is used by fn_plot()
+# "plotly" uploads the graphs to the plot.ly account and the email links to the hosted images.
+# "local" draws the graphs with matplotlib on v_ChartDir ( as v_ChartFormat "png" or "svg" ) and the images
+# are attached to the email, no external service is called so it works on servers without internet.
+
+v_RenderBackend = "plotly"
+v_ChartDir = "kb-analytics-charts"
+v_ChartFormat = "png"
+
+# Parameters : v_MaxPlotProcesses
+# This parameter is used by fn_plot_all()
+# This is the maximum number of graphs that are built and plotted at the same time, every graph is
+# plotted on its own process ( the drawing is CPU bound ). Set to 1 to plot the graphs one after another.
+
+v_MaxPlotProcesses = min(7, multiprocessing.cpu_count())
 
 # Global Functions
 
@@ -114,24 +258,15 @@ def fn_json_formatter(jsondata):
     print (jsonformatter)
 
 
-# Function : fn_get_page_count
-# Picks up the total pages under a url, this can be used to increment the web crawling
-
 
-def fn_get_page_count(url):
-
-    headers = {
-        'Content-Type': 'application/json'
-    }
 
-    response = zd.get(
-            url,
-            headers=headers
-    )
+# Function : fn_agent_name(v_id)
+# Returns the name of the user if its an agent ( None for the rest ), this is used to name the authors of the graphs.
 
-    data = response.json()
 
-    return data['page_count']
+def fn_agent_name(v_id):
+    user = fn_get_user(v_id)
+    return user.name if user is not None and user.role == "agent" else None
 
 # Step 1:
 # Get all the zendesk API , its manual and this is obtained from
@@ -144,9 +279,29 @@ d_zdapi = {
 "users" : v_top_level_url + "/api/v2/users.json",
 "categories" : v_top_level_url + "/api/v2/help_center/en-us/categories.json",
 "sub_catergories" : v_top_level_url + "/api/v2/help_center/categories/{id}/articles.json",
-"sections" : v_top_level_url + "/api/v2/help_center/categories/{id}/sections.json"
+"sections" : v_top_level_url + "/api/v2/help_center/categories/{id}/sections.json",
+"all_sections" : v_top_level_url + "/api/v2/help_center/sections.json",
+"incremental_articles" : v_top_level_url + "/api/v2/help_center/incremental/articles.json"
 }
 
+# The only fields of the articles API that are used by the graphs, the rest of the fields
+# ( mainly the article "body" ) are dropped while the json is parsed. The pagination fields are kept as well.
+
+l_ArticleFields = set([
+    "articles", "next_page", "page_count",
+    "id", "name", "html_url", "author_id", "section_id", "draft", "created_at", "updated_at"
+])
+
+# The articles, users, categories and sections are kept as compact records ( tuples ) with only the
+# fields used by the graphs, they are built once by fn_make_record() when the API data is read.
+
+Article = namedtuple('Article', [
+    'id', 'name', 'html_url', 'author_id', 'section_id', 'draft',
+    'category_id', 'category_name', 'created_at', 'updated_at'
+])
+Category = namedtuple('Category', ['id', 'name', 'updated_at'])
+Section = namedtuple('Section', ['id', 'name', 'category_id', 'updated_at'])
+
 # Step 2:
 # Create a list of category that you need further check
 # Here we are interested in knowing how much articles are under review
@@ -159,59 +314,47 @@ l_CategoryName = [
 # Step 3:
 # Function : fn_UserInfo
 # This function loops into the Zendesk API to find all the users list that are agents.
-# We then store all those users dictionary on a single list
+# We then store all those users on the user cache, the authors of the articles are marked so that the
+# ones missing from the cache are requested together when the graphs first need their name ( fn_agent_name() )
 
-def fn_UserInfo():
+def fn_UserInfo(l_articles):
 
-    # Local variables
+    fn_user_want(article.author_id for article in l_articles)
 
-    l_users = []
-    v_currentpage = 1
-    logger.debug("User list current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
+    if v_UserResolution == "ids":
+        return
 
-    # Get the API for categories from the d_zdapi mentioned above
+    # Get the API for categories from the d_zdapi mentioned above, only the agents are pulled
 
-    v_pageurl = d_zdapi['users']
+    v_pageurl = fn_add_query(d_zdapi['users'], "role=agent")
     logger.debug("Users URL: '{}'".format(v_pageurl))
 
-    # The URL changes on every page , the below parameter makes those adjustment
-
-    v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-    logger.info("Reading Users list URL: '{}'".format(v_pageurlincrement))
-
-    # Loop till we reach the end of the page.
-
-    while v_pageurlincrement != None:
+    # Loop till we reach the end of the page, the users list uses the cursor pagination.
+    # ( the listing rarely changes, so it is cached )
 
-        # Get the data from the url page
+    for data in fn_iter_pages(v_pageurl, cache=True, cursor=True):
 
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
         # print (fn_json_formatter((data)))
 
         # Loop through the data obtained from the API
-        # and just pick the information we are interested (i.e only agents) and append it to the list
-
-        for d_users in data['users']:
-            if d_users['role'] == "agent":
-                l_users.append(d_users)
-                logger.debug("List of Users: '{}'".format("user_name: " + d_users['name'].encode('ascii', 'ignore')))
-                logger.debug("List of Users: '{}'".format("user_id: " + str(d_users['id'])))
+        # and just pick the information we are interested (i.e only agents) and save it on the user cache
 
-        # Increment page
+        l_pageusers = [fn_make_record(User, d_users) for d_users in data['users']]
 
-        v_pageurlincrement = data['next_page']
-        logger.info("Reading User list URL: '{}'".format(v_pageurlincrement))
+        for user in l_pageusers:
+            if user.role == "agent":
+                logger.debug("List of Users: '{}'".format("user_name: " + user.name.encode('ascii', 'ignore')))
+                logger.debug("List of Users: '{}'".format("user_id: " + str(user.id)))
 
-    # Return the list to be used by the rest of the program
+        # Save the users on the user cache and the snapshot store
 
-    return l_users
+        fn_user_cache_put(l_pageusers)
+        fn_store_upsert('users', l_pageusers)
 
 # Step 4:
 # Function : get_categories_id
 # This function loops into the Zendesk API to find the categories ID for product that is of interest
-# We then store all those categories dictionary on a single list
+# We then store all those categories on a single list
 
 
 def fn_get_categories_id():
@@ -219,48 +362,28 @@ def fn_get_categories_id():
     # Local variables
 
     l_categories = []
-    v_currentpage = 1
-    logger.debug("Categories current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
 
     # Get the API for categories from the d_zdapi mentioned above
 
     v_pageurl = d_zdapi['categories']
     logger.debug("Categories URL: '{}'".format(v_pageurl))
 
-    # Get the max number of pages on the URL, so that we can crawl till the end of the page.
+    # Loop till we reach the end of the page ( the listing rarely changes, so it is cached )
 
-    v_maxpage = fn_get_page_count(v_pageurl)
-    logger.info("Categories max pages: '{}'".format(v_maxpage))
-
-    # Loop till we reach the end of the page.
+    for data in fn_iter_pages(v_pageurl, cache=True):
 
-    while v_currentpage <= v_maxpage:
-
-        # The URL changes on every page , the below parameter makes those adjustment
-
-        v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-        logger.info("Reading Categories URL: '{}'".format(v_pageurlincrement))
-
-        # Get the data from the url page
-
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
         # print (fn_json_formatter((data)))
 
         # Loop through the data obtained from the API and pick the necessary info
-        # we delete descriptions to avoid unnecessary usage of memory due to its content.
 
         for d_categories in data['categories']:
-            del d_categories['description']
-            l_categories.append(d_categories)
+            l_categories.append(fn_make_record(Category, d_categories))
             logger.debug("List of categories: '{}'".format("category_name: " + d_categories['name'].encode('ascii', 'ignore')))
             logger.debug("List of categories: '{}'".format("category_id: " + str(d_categories['id'])))
 
-        # Increment page
+    # Save the categories on the snapshot store
 
-        v_currentpage += 1
-        logger.debug("Incremented categories pages count: '{}'".format(v_currentpage))
+    fn_store_upsert('categories', l_categories)
 
     # Return the list to be used by the program fn_get_articles_info()
 
@@ -270,76 +393,120 @@ def fn_get_categories_id():
 # Step 5:
 # Function : fn_get_articles_info(categories_id,categories_name)
 # It uses the category ID that was provided by fn_get_categories_id()
-# and then pulls the articles all of them on those categories and then stores it onto the list
+# and then pulls the articles all of them on those categories, the articles are yielded one by one
+# as the pages arrive so that the whole category is never held in memory.
 
 
 def fn_get_articles_info(categories_id,categories_name):
 
-    # Local Variables
-
-    l_articles = []
-    v_currentpage = 1
-    logger.debug("Sub categories current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
-
     # Get the API for sub categories from the d_zdapi mentioned above
 
     v_pageurl = d_zdapi['sub_catergories'].format(id=str(categories_id))
     logger.debug("Sub categories page url: '{}'".format(v_pageurl))
 
-    # Get the max number of pages on the URL, so that we can crawl till the end of the page.
+    # Loop till we reach the end of the page.
+    # After the first page, the rest of the pages are fetched in parallel ( the order of the pages is preserved )
 
-    v_maxpage = fn_get_page_count(v_pageurl)
-    logger.info("Sub categories max pages: '{}'".format(v_maxpage))
+    for data in fn_iter_pages(v_pageurl, fields=l_ArticleFields):
 
-    # Loop till we reach the end of the page.
+        # print (fn_json_formatter((data)))
+
+        # Loop through the data obtained from the API
+        # We normalize the articles of the page, save them on the snapshot store and pass them on.
+
+        l_articles = [fn_normalize_article(d_articles, categories_id, categories_name) for d_articles in data['articles']]
+
+        fn_store_upsert('articles', l_articles)
+
+        for article in l_articles:
+            yield article
+
+
+# Function : fn_normalize_article(d_articles, categories_id, categories_name)
+# We build the Article record from the article dictionary, adding the category_id and category_name
+# so that its easy to divide by section, and also changes the date from JSON format to more readable format.
+
+def fn_normalize_article(d_articles, categories_id, categories_name):
+
+    d_articles['category_id'] = categories_id
+    d_articles['category_name'] = categories_name
 
-    while v_currentpage <= v_maxpage:
+    # NOTE: Zendesk JSON has two "updated_at" field, the main updated_at is the time when the metadata
+    # was updated (which is of no interest to us) and other inside translation dictionary tells
+    # when the documents was changed or re-translated from original content which makes more sense.
 
-        # The URL changes on every page , the below parameter makes those adjustment
+    article = fn_make_record(Article, d_articles)
+    logger.debug("List of sub categories: '{}'".format("category_name: " + article.category_name.encode('ascii', 'ignore')))
+    logger.debug("List of sub categories: '{}'".format("category_id: " + str(article.category_id)))
+    logger.debug("List of sub categories: '{}'".format("article_name: " + article.name.encode('ascii', 'ignore')))
+    logger.debug("List of sub categories: '{}'".format("article_url: " + article.html_url))
+    logger.debug("List of sub categories: '{}'".format("article_created: " + str(article.created_at)))
+    logger.debug("List of sub categories: '{}'".format("article_updated: " + str(article.updated_at)))
 
-        v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-        logger.info("Reading Sub categories URL: '{}'".format(v_pageurlincrement))
+    return article
 
-        # Get the data from the url page
 
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
+# Function : fn_get_incremental_articles(l_category, v_starttime)
+# Pulls only the articles that has been changed since "v_starttime" ( seconds since epoch ) using
+# the help center incremental API, the category of the article is found using its section.
+# The normalized articles are saved on the snapshot store and yielded page by page.
+
+def fn_get_incremental_articles(l_category, v_starttime):
+
+    # Local Variables
+
+    v_totalarticles = 0
+    d_seenids = set()
+    d_categorynames = dict((category.id, category.name) for category in l_category)
+    d_sectioncategory = {}
+
+    # Get the category id of all the sections
+
+    for data in fn_iter_pages(d_zdapi['all_sections'], cache=True):
+        l_sections = [fn_make_record(Section, d_sections) for d_sections in data['sections']]
+        for section in l_sections:
+            d_sectioncategory[section.id] = section.category_id
+        fn_store_upsert('sections', l_sections)
+
+    # Loop till the incremental API has no more pages
+
+    v_pageurlincrement = d_zdapi['incremental_articles'] + "?start_time=" + str(v_starttime)
+
+    while v_pageurlincrement != None:
+
+        data = fn_get_page(v_pageurlincrement, fields=l_ArticleFields)
         # print (fn_json_formatter((data)))
 
-        # Loop through the data obtained from the API
-        # We append all the dictionary information onto a list, during this process we add
-        # the category_id and category_name also to the list so that its easy to divide by section,
-        # and also changes the date from JSON format to more readable format.
+        l_articles = []
 
-        for d_articles in data['articles']:
-            d_articles['category_id'] = categories_id
-            d_articles['category_name'] = categories_name
-            v_modifycreatetime = dateutil.parser.parse(d_articles['created_at'])
+        # The next page starts at the end time of this one, the articles of that second come again
 
+        for d_articles in data['articles']:
+            v_categoryid = d_sectioncategory.get(d_articles['section_id'])
+            if v_categoryid in d_categorynames and d_articles['id'] not in d_seenids:
+                d_seenids.add(d_articles['id'])
+                l_articles.append(fn_normalize_article(
+                        d_articles,
+                        v_categoryid,
+                        d_categorynames[v_categoryid]
+                ))
 
-            # NOTE: Zendesk JSON has two "updated_at" field, the main updated_at is the time when the metadata
-            # was updated (which is of no interest to us) and other inside translation dictionary tells
-            # when the documents was changed or re-translated from original content which makes more sense.
+        # Save the articles on the snapshot store
 
-            del d_articles['body']
-            d_articles['created_at'] = str(v_modifycreatetime)
-            l_articles.append(d_articles)
-            logger.debug("List of sub categories: '{}'".format("category_name: " + d_articles['category_name'].encode('ascii', 'ignore')))
-            logger.debug("List of sub categories: '{}'".format("category_id: " + str(d_articles['category_id'])))
-            logger.debug("List of sub categories: '{}'".format("article_name: " + d_articles['name'].encode('ascii', 'ignore')))
-            logger.debug("List of sub categories: '{}'".format("article_url: " + d_articles['html_url']))
-            logger.debug("List of sub categories: '{}'".format("article_created: " + str(d_articles['created_at'])))
-            logger.debug("List of sub categories: '{}'".format("article_updated: " + str(d_articles['updated_at'])))
+        fn_store_upsert('articles', l_articles)
+        v_totalarticles += len(l_articles)
 
-        # Increment page
+        for article in l_articles:
+            yield article
 
-        v_currentpage += 1
-        logger.debug("Incremented sub categories pages count: '{}'".format(v_currentpage))
+        # Stop when the page is empty, else move to the next page
 
-    # Return the list to be used by rest of the program in the main() block
+        if not data['articles'] or data['next_page'] == v_pageurlincrement:
+            v_pageurlincrement = None
+        else:
+            v_pageurlincrement = data['next_page']
 
-    return l_articles
+    logger.info("Total articles changed since '{0}': '{1}'".format(v_starttime, v_totalarticles))
 
 # Step 6:
 # Function : fn_PlotOverallContributors()
@@ -348,89 +515,567 @@ def fn_get_articles_info(categories_id,categories_name):
 def fn_getSectionName(categories_id,categories_name):
 
     l_sections = []
-    v_currentpage = 1
-    logger.debug("Section current page: '{}'".format(v_currentpage))
-    headers = {'Content-Type': 'application/json'}
 
     # Get the API for sections from the d_zdapi mentioned above
 
     v_pageurl = d_zdapi['sections'].format(id=str(categories_id))
     logger.debug("Section page url: '{}'".format(v_pageurl))
 
-    # Get the max number of pages on the URL, so that we can crawl till the end of the page.
-
-    v_maxpage = fn_get_page_count(v_pageurl)
-    logger.info("Section max pages: '{}'".format(v_maxpage))
-
-    # Loop till we reach the end of the page.
-
-    while v_currentpage <= v_maxpage:
+    # Loop till we reach the end of the page ( the listing rarely changes, so it is cached )
 
-        # The URL changes on every page , the below parameter makes those adjustment
+    for data in fn_iter_pages(v_pageurl, cache=True):
 
-        v_pageurlincrement = v_pageurl + "?page=" + str(v_currentpage)
-        logger.info("Section categories URL: '{}'".format(v_pageurlincrement))
-
-        # Get the data from the url page
-
-        response = zd.get(v_pageurlincrement, headers=headers)
-        data = response.json()
         # print (fn_json_formatter((data)))
 
         # Loop through the data obtained from the API
-        # We append all the dictionary information onto a list, during this process we add
-        # the category_id and category_name also to the list so that its easy to divide by section
+        # We append all the sections onto a list, during this process we set
+        # the category_id also on the section so that its easy to divide by section
 
         for d_sections in data['sections']:
             d_sections['category_id'] = categories_id
-            d_sections['category_name'] = categories_name
-            l_sections.append(d_sections)
-            logger.debug("List of section: '{}'".format("category_id: " + str(d_sections['category_id'])))
-            logger.debug("List of section: '{}'".format("category_name: " + d_sections['category_name'].encode('ascii', 'ignore')))
+            l_sections.append(fn_make_record(Section, d_sections))
+            logger.debug("List of section: '{}'".format("category_id: " + str(categories_id)))
+            logger.debug("List of section: '{}'".format("category_name: " + categories_name.encode('ascii', 'ignore')))
             logger.debug("List of section: '{}'".format("section_id: " + str(d_sections['id'])))
             logger.debug("List of section: '{}'".format("section_name: " + d_sections['name'].encode('ascii', 'ignore')))
-        # Increment page
 
-        v_currentpage += 1
-        logger.debug("Incremented section pages count: '{}'".format(v_currentpage))
+    # Save the sections on the snapshot store
+
+    fn_store_upsert('sections', l_sections)
 
     # Return the list to be used by rest of the program in the main() block
 
     return l_sections
 
 
-# Step 6:
-# Function : fn_PlotOverallTopContributors()
-# The below function calculate the overall total articles per author
+# Function : fn_get_category_data(category)
+# Pulls all the articles of a single category and for the category inside the l_CategoryName
+# the sections as well, this is run in parallel for all the categories by main()
 
-def fn_PlotOverallTopContributors(l_articles, d_UserList):
+def fn_get_category_data(category):
 
-    # Local variables
+    logger.info("Pull data for category: '{}'".format(category.name.encode('ascii', 'ignore')))
+
+    l_articles = list(fn_get_articles_info(
+            category.id,
+            category.name
+    ))
+
+    # For the category inside the l_categoryName get the section name as well
+
+    l_sections = fn_get_category_sections(category)
+
+    logger.debug("End pulling data for category: '{}'".format(category.name.encode('ascii', 'ignore')))
+
+    return l_articles, l_sections
+
+
+# Function : fn_get_category_sections(category)
+# Pulls the sections of the category if the category is inside the l_CategoryName
+
+def fn_get_category_sections(category):
+
+    l_sections = []
+
+    if category.name in l_CategoryName:
+        logger.info("Pull data for section: '{}'".format(category.name.encode('ascii', 'ignore')))
+        l_sections = fn_getSectionName(
+                category.id,
+                category.name
+        )
+        logger.debug("End pulling data from section: '{}'".format(category.name.encode('ascii', 'ignore')))
+
+    return l_sections
+
+
+# Function : fn_build_lookups(l_sections, l_category)
+# Index the sections and categories name by their id, this is built once per run
+# and used by fn_aggregate_articles() to map the id's on the articles to its name.
+# The agents name are looked up by their id with fn_agent_name() ( the users are requested on the first lookup ).
+
+def fn_build_lookups(l_sections, l_category):
+
+    d_lookups = {
+        "users": fn_agent_name,
+        "sections": {},
+        "categories": {}
+    }
+
+    for section in l_sections:
+        d_lookups['sections'][section.id] = section.name
+
+    for category in l_category:
+        d_lookups['categories'][category.id] = category.name
+
+    logger.debug("Total sections / categories indexed: '{0}' / '{1}'".format(
+            len(d_lookups['sections']),
+            len(d_lookups['categories'])
+    ))
 
+    return d_lookups
+
+
+# Function : fn_aggregate_articles(l_articles, d_lookups)
+# Calculate all the metrics used by the graphs with a single loop through the articles, the plot
+# functions then only draw the metrics. The metrics ( the key of the returned dictionary ) are
+#   "author_totals"          : overall total articles per author name
+#   "category_totals"        : overall total articles per category name
+#   "category_drafts"        : overall total articles in draft per category name
+#   "category_published"     : overall total articles published per category name
+#   "month_totals"           : total articles per month ( YYYY-MM ) for the last 12 months
+#   "km_sections"            : total articles per section of the KM review process
+#   "last_month_categories"  : total articles per category name for the last month
+#   "last_month_authors"     : total articles per author name for the last month
+#   "draft_age"              : total articles in draft per age bucket
+
+def fn_aggregate_articles(l_articles, d_lookups):
+
+    # Local Variables
+
+    v_TodaysDate = datetime.date.today()
+    v_LastMonthDate = v_TodaysDate + relativedelta(months=-1)
+    v_LastMonth = (v_LastMonthDate.year, v_LastMonthDate.month)
+    v_CurrentTime = datetime.datetime.now()
+    v_LastWeekTime = v_CurrentTime + relativedelta(weeks=-1)
+    v_LastMonthTime = v_CurrentTime + relativedelta(months=-1)
+    v_ThreeMonthTime = v_CurrentTime + relativedelta(months=-3)
+    d_Months = {}
     d_AuthorOccurance = {}
-    d_TotalOccurance = {}
-    x_plot = []
-    y_plot = []
+    d_LastMonthAuthor = {}
+    d_metrics = {
+        "author_totals": {},
+        "category_totals": {},
+        "category_drafts": {},
+        "category_published": {},
+        "month_totals": {},
+        "km_sections": {
+            "KM Review": 0,
+            "SME Review": 0,
+            "First Draft": 0
+        },
+        "last_month_categories": {},
+        "last_month_authors": {},
+        "draft_age": collections.OrderedDict()
+    }
+    d_metrics['draft_age']['Less than a week'] = 0
+    d_metrics['draft_age']['Less than a month'] = 0
+    d_metrics['draft_age']['Less than 3 months'] = 0
+    d_metrics['draft_age']['More than 3 months'] = 0
+
+    # Get the last 12 months dates
+
+    v_HowManyMonths = -13
+
+    while v_HowManyMonths <= -1:
+        v_MonthDate = v_TodaysDate + relativedelta(months=v_HowManyMonths)
+        d_Months[(v_MonthDate.year, v_MonthDate.month)] = datetime.date.strftime(v_MonthDate, "%Y-%m")
+        v_HowManyMonths += 1
+
+    logger.debug("12 Months list: '{}'".format(sorted(d_Months.values())))
+
+    # Loop through the articles once and count every metric
+
+    for article in l_articles:
+
+        v_Month = (article.created_at.year, article.created_at.month)
+        v_Category = d_lookups['categories'].get(article.category_id, article.category_name)
+
+        # Overall total articles per author
+
+        d_AuthorOccurance[article.author_id] = d_AuthorOccurance.get(article.author_id, 0) + 1
+
+        # Overall total articles per category separated by Published and in Draft mode
+
+        d_metrics['category_totals'][v_Category] = d_metrics['category_totals'].get(v_Category, 0) + 1
+        d_metrics['category_drafts'].setdefault(v_Category, 0)
+        d_metrics['category_published'].setdefault(v_Category, 0)
+        if article.draft == True:
+            d_metrics['category_drafts'][v_Category] += 1
+        if article.draft == False:
+            d_metrics['category_published'][v_Category] += 1
+
+        # Total articles per month for the last 12 months
+
+        if v_Month in d_Months:
+            v_MonthName = d_Months[v_Month]
+            d_metrics['month_totals'][v_MonthName] = d_metrics['month_totals'].get(v_MonthName, 0) + 1
+
+        # Total articles under different section of KM review process
+
+        if article.section_id in d_lookups['sections']:
+            v_Section = d_lookups['sections'][article.section_id]
+            d_metrics['km_sections'][v_Section] = d_metrics['km_sections'].get(v_Section, 0) + 1
 
-    # Count the number of articles created by a Author
+        # Total articles per category and per author for the last month
 
-    for d_Author in l_articles:
-        Total = d_Author['author_id']
-        if Total not in d_AuthorOccurance:
-            d_AuthorOccurance[Total] = 0
-        if Total in d_AuthorOccurance:
-            d_AuthorOccurance[Total] += 1
+        if v_Month == v_LastMonth:
+            if article.category_name not in l_CategoryName:
+                d_metrics['last_month_categories'][v_Category] = d_metrics['last_month_categories'].get(v_Category, 0) + 1
+            d_LastMonthAuthor[article.author_id] = d_LastMonthAuthor.get(article.author_id, 0) + 1
+
+        # The draft articles by the number days it was open
+        # NOTE: "More than 3 months" counts all the drafts older than a month, as it always did.
+
+        if article.draft == True:
+            v_stringtodate = article.created_at.replace(hour=0, minute=0, second=0)
+            if v_stringtodate >= v_LastWeekTime and v_stringtodate < v_CurrentTime:
+                d_metrics['draft_age']['Less than a week'] += 1
+            if v_stringtodate >= v_LastMonthTime and v_stringtodate < v_LastWeekTime:
+                d_metrics['draft_age']['Less than a month'] += 1
+            if v_stringtodate >= v_ThreeMonthTime and v_stringtodate < v_LastMonthTime:
+                d_metrics['draft_age']['Less than 3 months'] += 1
+            if v_stringtodate < v_LastMonthTime:
+                d_metrics['draft_age']['More than 3 months'] += 1
+
+    # Map the Author's Id with the Author's name from the users lookup
+
+    for key, value in d_AuthorOccurance.items():
+        v_author = d_lookups['users'](key)
+        if v_author is not None:
+            d_metrics['author_totals'][v_author] = value
+
+    for key, value in d_LastMonthAuthor.items():
+        v_author = d_lookups['users'](key)
+        if v_author is not None:
+            d_metrics['last_month_authors'][v_author] = value
 
     logger.debug("Overall KB Contributors: '{}'".format(d_AuthorOccurance))
+    logger.debug("Overall Total Articles per Category: '{}'".format(d_metrics['category_totals']))
+    logger.debug("Overall Total Articles in Draft per Category: '{}'".format(d_metrics['category_drafts']))
+    logger.debug("Overall Total Articles  per Published Category: '{}'".format(d_metrics['category_published']))
+    logger.debug("Total Article created for last 12 Month: '{}'".format(d_metrics['month_totals']))
+    logger.debug("Total Article in KM Review: '{}'".format(d_metrics['km_sections']))
+    logger.debug("Total Article Per Category for Last Month: '{}'".format(d_metrics['last_month_categories']))
+    logger.debug("Total Article Per Author for the month: '{}'".format(d_metrics['last_month_authors']))
+    logger.debug("Total Article in Draft mode: '{}'".format(d_metrics['draft_age']))
+
+    return d_metrics
+
+
+# Function : fn_build_columns(l_articles, d_lookups)
+# Change the articles to a columnar form for fn_aggregate_columns(), every column is an array with one value
+# per article. The authors, categories and sections are coded with a number ( in the order they are first seen ),
+# the name of the code is on the matching list. The section code is -1 when it is not a KM review section.
+#   "author"    : author code              "category" : category code
+#   "section"   : section code             "draft"    : 1 on draft, 0 published, -1 unknown
+#   "excluded"  : 1 when the category is on l_CategoryName
+#   "month"     : created month as year * 12 + month - 1
+#   "day"       : created date as the day ordinal, see fn_ordinal_days()
+
+def fn_build_columns(l_articles, d_lookups):
+
+    # Local Variables
+
+    d_authors = {}
+    d_categories = {}
+    d_sections = {}
+    d_columns = {
+        "author": array.array('l'),
+        "category": array.array('l'),
+        "section": array.array('l'),
+        "draft": array.array('b'),
+        "excluded": array.array('b'),
+        "month": array.array('l'),
+        "day": array.array('l')
+    }
+
+    for article in l_articles:
+        v_Category = d_lookups['categories'].get(article.category_id, article.category_name)
+        d_columns['author'].append(d_authors.setdefault(article.author_id, len(d_authors)))
+        d_columns['category'].append(d_categories.setdefault(v_Category, len(d_categories)))
+        if article.section_id in d_lookups['sections']:
+            d_columns['section'].append(d_sections.setdefault(d_lookups['sections'][article.section_id], len(d_sections)))
+        else:
+            d_columns['section'].append(-1)
+        d_columns['draft'].append(1 if article.draft == True else 0 if article.draft == False else -1)
+        d_columns['excluded'].append(1 if article.category_name in l_CategoryName else 0)
+        d_columns['month'].append(article.created_at.year * 12 + article.created_at.month - 1)
+        d_columns['day'].append(article.created_at.toordinal())
+
+    # Change the columns to numpy arrays ( this doesn't copy the data ) and add the names of the codes
+
+    for v_column in list(d_columns):
+        d_columns[v_column] = np.frombuffer(d_columns[v_column], dtype=d_columns[v_column].typecode)
+
+    d_columns['authors'] = sorted(d_authors, key=d_authors.get)
+    d_columns['categories'] = sorted(d_categories, key=d_categories.get)
+    d_columns['sections'] = sorted(d_sections, key=d_sections.get)
+
+    logger.debug("Total articles / authors / categories / sections on columns: '{0}' / '{1}' / '{2}' / '{3}'".format(
+            len(d_columns['author']),
+            len(d_columns['authors']),
+            len(d_columns['categories']),
+            len(d_columns['sections'])
+    ))
+
+    return d_columns
+
+
+# Function : fn_ordinal_days(v_time)
+# The datetime in days counted the same way as the "day" column of fn_build_columns()
+
+def fn_ordinal_days(v_time):
+    return v_time.toordinal() + (v_time.hour * 3600 + v_time.minute * 60 + v_time.second + v_time.microsecond / 1e6) / 86400
+
+
+# Function : fn_count_codes(a_codes, l_names)
+# Count the codes on the array and return the ( name, total ) of every code in the order they are first seen
+
+def fn_count_codes(a_codes, l_names):
+    if not len(a_codes):
+        return []
+    a_unique, a_first, a_counts = np.unique(a_codes, return_index=True, return_counts=True)
+    return [(l_names[a_unique[v_index]], int(a_counts[v_index])) for v_index in np.argsort(a_first, kind='mergesort')]
 
-    # Map the Author's Id with the Author's name from the list obtained above
+
+# Function : fn_aggregate_columns(d_columns, d_lookups)
+# Same as fn_aggregate_articles() but calculated with numpy on the columns built by fn_build_columns(),
+# the metrics are the same ( even the order of the keys ) so the graphs doesn't change.
+
+def fn_aggregate_columns(d_columns, d_lookups):
+
+    # Local Variables
+
+    v_TodaysDate = datetime.date.today()
+    v_LastMonthDate = v_TodaysDate + relativedelta(months=-1)
+    v_LastMonth = v_LastMonthDate.year * 12 + v_LastMonthDate.month - 1
+    v_CurrentTime = datetime.datetime.now()
+    v_LastWeekTime = fn_ordinal_days(v_CurrentTime + relativedelta(weeks=-1))
+    v_LastMonthTime = fn_ordinal_days(v_CurrentTime + relativedelta(months=-1))
+    v_ThreeMonthTime = fn_ordinal_days(v_CurrentTime + relativedelta(months=-3))
+    v_CurrentTime = fn_ordinal_days(v_CurrentTime)
+    v_TotalCategories = len(d_columns['categories'])
+    a_isdraft = d_columns['draft'] == 1
+    a_ispublished = d_columns['draft'] == 0
+    a_islastmonth = d_columns['month'] == v_LastMonth
+    a_day = d_columns['day'][a_isdraft]
+    d_metrics = {
+        "author_totals": {},
+        "category_totals": {},
+        "category_drafts": {},
+        "category_published": {},
+        "month_totals": {},
+        "km_sections": {
+            "KM Review": 0,
+            "SME Review": 0,
+            "First Draft": 0
+        },
+        "last_month_categories": {},
+        "last_month_authors": {},
+        "draft_age": collections.OrderedDict()
+    }
+
+    # Overall total articles per author, the Author's Id is then mapped with the Author's name
+
+    d_AuthorOccurance = dict(fn_count_codes(d_columns['author'], d_columns['authors']))
 
     for key, value in d_AuthorOccurance.items():
-        for v_Author in d_UserList:
-            if v_Author['id'] == key:
-               d_TotalOccurance[v_Author['name']] = value
+        v_author = d_lookups['users'](key)
+        if v_author is not None:
+            d_metrics['author_totals'][v_author] = value
+
+    # Overall total articles per category separated by Published and in Draft mode
+
+    a_totals = np.bincount(d_columns['category'], minlength=v_TotalCategories)
+    a_drafts = np.bincount(d_columns['category'][a_isdraft], minlength=v_TotalCategories)
+    a_published = np.bincount(d_columns['category'][a_ispublished], minlength=v_TotalCategories)
+
+    for v_code, v_Category in enumerate(d_columns['categories']):
+        d_metrics['category_totals'][v_Category] = int(a_totals[v_code])
+        d_metrics['category_drafts'][v_Category] = int(a_drafts[v_code])
+        d_metrics['category_published'][v_Category] = int(a_published[v_code])
+
+    # Total articles per month for the last 12 months
+
+    a_months = np.bincount(d_columns['month'][
+            (d_columns['month'] > v_LastMonth - 13) & (d_columns['month'] <= v_LastMonth)
+    ] - (v_LastMonth - 12), minlength=13)
+
+    for v_index, v_total in enumerate(a_months):
+        if v_total:
+            v_Month = v_LastMonth - 12 + v_index
+            d_metrics['month_totals']["%04d-%02d" % (v_Month // 12, v_Month % 12 + 1)] = int(v_total)
+
+    # Total articles under different section of KM review process
+
+    for key, value in fn_count_codes(d_columns['section'][d_columns['section'] >= 0], d_columns['sections']):
+        d_metrics['km_sections'][key] = d_metrics['km_sections'].get(key, 0) + value
+
+    # Total articles per category and per author for the last month
+
+    d_metrics['last_month_categories'] = dict(fn_count_codes(
+            d_columns['category'][a_islastmonth & (d_columns['excluded'] == 0)],
+            d_columns['categories']
+    ))
+
+    for key, value in dict(fn_count_codes(d_columns['author'][a_islastmonth], d_columns['authors'])).items():
+        v_author = d_lookups['users'](key)
+        if v_author is not None:
+            d_metrics['last_month_authors'][v_author] = value
+
+    # The draft articles by the number days it was open
+    # NOTE: "More than 3 months" counts all the drafts older than a month, as it always did.
+
+    d_metrics['draft_age']['Less than a week'] = int(np.count_nonzero((a_day >= v_LastWeekTime) & (a_day < v_CurrentTime)))
+    d_metrics['draft_age']['Less than a month'] = int(np.count_nonzero((a_day >= v_LastMonthTime) & (a_day < v_LastWeekTime)))
+    d_metrics['draft_age']['Less than 3 months'] = int(np.count_nonzero((a_day >= v_ThreeMonthTime) & (a_day < v_LastMonthTime)))
+    d_metrics['draft_age']['More than 3 months'] = int(np.count_nonzero(a_day < v_LastMonthTime))
+
+    logger.debug("Overall KB Contributors: '{}'".format(d_AuthorOccurance))
+    logger.debug("Overall Total Articles per Category: '{}'".format(d_metrics['category_totals']))
+    logger.debug("Total Article created for last 12 Month: '{}'".format(d_metrics['month_totals']))
+    logger.debug("Total Article in KM Review: '{}'".format(d_metrics['km_sections']))
+    logger.debug("Total Article Per Category for Last Month: '{}'".format(d_metrics['last_month_categories']))
+    logger.debug("Total Article Per Author for the month: '{}'".format(d_metrics['last_month_authors']))
+    logger.debug("Total Article in Draft mode: '{}'".format(d_metrics['draft_age']))
+
+    return d_metrics
+
+
+# Function : fn_plot(fig, filename)
+# Plot the figure with the v_RenderBackend and return where it can be found.
+# "plotly" uploads the figure to plot.ly and returns its url, "local" draws it with fn_render_local()
+# and returns the path of the image.
+
+def fn_plot(fig, filename):
+    if v_RenderBackend == "local":
+        return fn_render_local(fig, filename)
+    return py.plot(
+            fig,
+            filename=filename
+    )
+
+
+# Function : fn_render_local(fig, filename)
+# Draw the plotly figure ( bar, scatter and pie traces ) with matplotlib and save it as "filename" on
+# v_ChartDir using the v_ChartFormat, no external service is called. Returns the path of the image.
+
+def fn_render_local(fig, filename):
 
-    logger.debug("Overall KB Contributors name: '{}'".format(d_TotalOccurance))
+    # Local Variables
+
+    d_layout = fig.get('layout') or {}
+    v_chartfile = os.path.join(v_ChartDir, filename + "." + v_ChartFormat)
+    figure = plt.figure(figsize=(d_layout.get('width', 1000) / 100.0, d_layout.get('height', 600) / 100.0), dpi=100)
+    axes = figure.add_subplot(1, 1, 1)
+    l_categories = []
+
+    # The graphs are drawn at the same time by the plot processes, the folder may be created by another one
+
+    try:
+        os.makedirs(v_ChartDir)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    # Category names ( eg.s months, authors ) are plotted at their position on the axis
+
+    def fn_positions(l_values):
+        for v_value in l_values:
+            if v_value not in l_categories:
+                l_categories.append(v_value)
+        return [l_categories.index(v_value) for v_value in l_values]
+
+    for trace in fig['data']:
+        v_type = trace.get('type') or type(trace).__name__.lower()
+
+        if v_type == 'pie':
+
+            # Empty slices are left out, else their labels are drawn on top of each other
+
+            l_slices = [(v_label, v_value) for v_label, v_value in zip(trace['labels'], trace['values']) if v_value]
+            v_total = sum(v_value for v_label, v_value in l_slices)
+            v_hole = trace.get('hole') or 0
+            axes.pie(
+                    [v_value for v_label, v_value in l_slices],
+                    labels=[v_label for v_label, v_value in l_slices],
+                    autopct=lambda v_percent: str(int(round(v_percent * v_total / 100.0))),
+                    counterclock=trace.get('direction') != 'clockwise',
+                    wedgeprops=dict(width=1 - v_hole) if v_hole else None
+            )
+            axes.axis('equal')
+
+        elif v_type == 'bar' and trace.get('orientation') == 'h':
+            axes.barh(fn_positions(trace['y']), trace['x'], label=trace.get('name'))
+
+        elif v_type == 'bar':
+            axes.bar(fn_positions(trace['x']), trace['y'], label=trace.get('name'))
+
+        else:
+            v_marker = 'o' if 'markers' in (trace.get('mode') or '') else None
+            axes.plot(fn_positions(trace['x']), trace['y'], marker=v_marker, label=trace.get('name'))
+
+    # Name the category positions on the axis
+
+    if l_categories:
+        if any(trace.get('orientation') == 'h' for trace in fig['data']):
+            axes.set_yticks(range(len(l_categories)))
+            axes.set_yticklabels(l_categories)
+        else:
+            axes.set_xticks(range(len(l_categories)))
+            axes.set_xticklabels(l_categories, rotation=30, ha='right')
+
+    # Titles and legend from the layout
+
+    v_title = d_layout.get('title')
+    if isinstance(v_title, dict):
+        v_title = v_title.get('text')
+    axes.set_title(v_title or '')
+    axes.set_xlabel((d_layout.get('xaxis') or {}).get('title') or '')
+    axes.set_ylabel((d_layout.get('yaxis') or {}).get('title') or '')
+
+    if len(fig['data']) > 1:
+        axes.legend()
+
+    figure.tight_layout()
+    figure.savefig(v_chartfile, format=v_ChartFormat)
+    plt.close(figure)
+
+    logger.debug("Graph saved to file: '{}'".format(v_chartfile))
+
+    return v_chartfile
+
+
+# Function : fn_plot_all(l_plotfunctions, d_metrics)
+# Call every plot function with the metrics on a pool of at most v_MaxPlotProcesses processes,
+# the url ( or file ) of the graphs are returned in the same order as the functions on the list.
+# The fetch engine is stopped before the processes are forked, the API is not called after this point.
+
+def fn_plot_all(l_plotfunctions, d_metrics):
+    l_tasks = [(fn_plotfunction, d_metrics) for fn_plotfunction in l_plotfunctions]
+    if v_MaxPlotProcesses <= 1:
+        return [fn_plot_task(t_task) for t_task in l_tasks]
+    fn_fetch_engine_stop()
+    pool = multiprocessing.Pool(min(v_MaxPlotProcesses, len(l_tasks)))
+    try:
+        return pool.map(fn_plot_task, l_tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+# Function : fn_plot_task(t_task)
+# Run a single plot function for fn_plot_all(), "t_task" is the ( function, metrics ) tuple
+
+def fn_plot_task(t_task):
+    fn_plotfunction, d_metrics = t_task
+    logger.info("Start plotting the graph: '{}'".format(fn_plotfunction.__name__))
+    v_graph = fn_plotfunction(d_metrics)
+    logger.debug("End plotting the graph: '{0}': '{1}'".format(fn_plotfunction.__name__, v_graph))
+    return v_graph
+
+
+# Step 6:
+# Function : fn_PlotOverallTopContributors()
+# The below function plots the overall total articles per author
+
+def fn_PlotOverallTopContributors(d_metrics):
+
+    # Local variables
+
+    d_TotalOccurance = d_metrics['author_totals']
+    x_plot = []
+    y_plot = []
 
     # Sort the list based on the highest contributors and select the Top 10
 
@@ -484,9 +1129,9 @@ def fn_PlotOverallTopContributors(l_articles, d_UserList):
             layout=layout
     )
 
-    url_OverallContributor = py.plot(
+    url_OverallContributor = fn_plot(
             fig,
-            filename='Overall-Top-10-Contributors'
+            'Overall-Top-10-Contributors'
     )
 
     logger.debug("Overall KB Contributors hosted URL: '{}'".format(
@@ -498,47 +1143,21 @@ def fn_PlotOverallTopContributors(l_articles, d_UserList):
 
 # Step 7:
 # Function : fn_PlotTotalArticlePerCategory()
-# The below function calculate total articles per category and also separate the count
+# The below function plots total articles per category and also separate the count
 # based on articles if its publised or its on draft.
 
-def fn_PlotOverallTotalArticlePerCategory(l_articles):
+def fn_PlotOverallTotalArticlePerCategory(d_metrics):
 
     # Local variables
 
-    d_CategoryOccurance = {}
-    d_DraftArticles = {}
-    d_NonDraftArticles = {}
+    d_CategoryOccurance = d_metrics['category_totals']
+    d_DraftArticles = d_metrics['category_drafts']
+    d_NonDraftArticles = d_metrics['category_published']
     x1_plot = []
     y1_plot = []
     y2_plot = []
     y3_plot = []
 
-    # Count the Total number of articles by category and separate them with Published and in Draft mode.
-
-    for d_category in l_articles:
-
-        Total = d_category['category_name']
-
-        if Total not in d_CategoryOccurance:
-            d_CategoryOccurance[Total] = 0
-
-        if Total not in d_DraftArticles:
-            d_DraftArticles[Total] = 0
-
-        if Total not in d_NonDraftArticles:
-            d_NonDraftArticles[Total] = 0
-
-        if Total in d_CategoryOccurance:
-            d_CategoryOccurance[Total] += 1
-            if d_category['draft'] == True:
-                    d_DraftArticles[Total] += 1
-            if d_category['draft'] == False:
-                    d_NonDraftArticles[Total] += 1
-
-    logger.debug("Overall Total Articles per Category: '{}'".format(d_CategoryOccurance))
-    logger.debug("Overall Total Articles in Draft per Category: '{}'".format(d_DraftArticles))
-    logger.debug("Overall Total Articles  per Published Category: '{}'".format(d_NonDraftArticles))
-
     od = collections.OrderedDict(
             sorted(
                     d_CategoryOccurance.items(),
@@ -554,14 +1173,8 @@ def fn_PlotOverallTotalArticlePerCategory(l_articles):
         y1_plot.append(value)
 
     for key_l in x1_plot:
-        for key,value in d_DraftArticles.items():
-            if key == key_l:
-                y2_plot.append(value)
-
-    for key_l in x1_plot:
-        for key,value in d_NonDraftArticles.items():
-            if key == key_l:
-                y3_plot.append(value)
+        y2_plot.append(d_DraftArticles[key_l])
+        y3_plot.append(d_NonDraftArticles[key_l])
 
     trace0 = go.Scatter(
             x=x1_plot,
@@ -637,9 +1250,9 @@ def fn_PlotOverallTotalArticlePerCategory(l_articles):
             layout=layout
     )
 
-    url_OverallTotalArticlePerCategory = py.plot(
+    url_OverallTotalArticlePerCategory = fn_plot(
             fig,
-            filename='Overall-Articles-Per-Category'
+            'Overall-Articles-Per-Category'
     )
 
     logger.debug("Overall Total Article per category hosted URL: '{}'".format(
@@ -655,39 +1268,14 @@ def fn_PlotOverallTotalArticlePerCategory(l_articles):
 # based on articles if its published or its on draft.
 
 
-def fn_PlotTotalArticlesPerMonth(l_articles):
+def fn_PlotTotalArticlesPerMonth(d_metrics):
 
     # Local Variables
 
-    v_HowManyMonths = -13
-    l_Months = []
-    d_ArticlesPerMonth = {}
+    d_ArticlesPerMonth = d_metrics['month_totals']
     x_plot=[]
     y_plot=[]
 
-    # Get the last 12 months dates
-
-    while v_HowManyMonths <= -1:
-        v_TodaysDate = datetime.date.today() + relativedelta(months=v_HowManyMonths)
-        v_Months = datetime.date.strftime(v_TodaysDate,"%Y-%m")
-        l_Months.append(v_Months)
-        v_HowManyMonths += 1
-
-    logger.debug("12 Months list: '{}'".format(l_Months))
-
-    # Get the total occurance of article per month.
-
-    for Months in l_Months:
-        for d_category in l_articles:
-            if d_category['created_at'][:7] == str(Months):
-                Total = d_category['created_at'][:7]
-                if Total not in d_ArticlesPerMonth:
-                    d_ArticlesPerMonth[Total] = 0
-                if Total in d_ArticlesPerMonth:
-                    d_ArticlesPerMonth[Total] += 1
-
-    logger.debug("Total Article created for last 12 Month: '{}'".format(d_ArticlesPerMonth))
-
     # Sort the key to get in a ordered list.
 
     for key in sorted(d_ArticlesPerMonth):
@@ -742,9 +1330,9 @@ def fn_PlotTotalArticlesPerMonth(l_articles):
             layout=layout
     )
 
-    url_TotalArticlesPerMonth = py.plot(
+    url_TotalArticlesPerMonth = fn_plot(
             fig,
-            filename='total-article-12-months'
+            'total-article-12-months'
     )
 
     logger.debug("Total Article for last 12 Months hosted URL: '{}'".format(
@@ -760,31 +1348,14 @@ def fn_PlotTotalArticlesPerMonth(l_articles):
 # based on articles if its published or its on draft.
 
 
-def fn_PlotArticleUnderKMSections(l_articles, l_sections):
+def fn_PlotArticleUnderKMSections(d_metrics):
 
     # Local Variables
 
-    d_ArticlesPerKMSection = {
-        "KM Review": 0,
-        "SME Review": 0,
-        "First Draft": 0
-    }
+    d_ArticlesPerKMSection = d_metrics['km_sections']
     x_plot=[]
     y_plot=[]
 
-    # Get the total articles under different section of KM review process.
-
-    for d_sections in l_sections:
-        for d_category in l_articles:
-            if d_sections['id'] == d_category['section_id']:
-                Total = d_sections['name']
-                if Total not in d_ArticlesPerKMSection:
-                    d_ArticlesPerKMSection[Total] = 0
-                if Total in d_ArticlesPerKMSection:
-                    d_ArticlesPerKMSection[Total] += 1
-
-    logger.debug("Total Article in KM Review: '{}'".format(d_ArticlesPerKMSection))
-
     # Plot the values on Pie Chart.
 
     for key, value in d_ArticlesPerKMSection.items():
@@ -837,9 +1408,9 @@ def fn_PlotArticleUnderKMSections(l_articles, l_sections):
             layout=layout
     )
 
-    url_TotalArticleUnderKMSection = py.plot(
+    url_TotalArticleUnderKMSection = fn_plot(
             fig,
-            filename='Total-Article-Under-KM-Review'
+            'Total-Article-Under-KM-Review'
     )
 
     logger.debug("Total Article under KM Section hosted URL: '{}'".format(
@@ -851,32 +1422,17 @@ def fn_PlotArticleUnderKMSections(l_articles, l_sections):
 
 # Step 9:
 # Function : fn_PlotTotalArticlesPerMonth()
-# The below function calculate total articles per category for last month
+# The below function plots total articles per category for last month
 
 
-def fn_PlotTotalArticleforMonthPerCategory(l_articles):
+def fn_PlotTotalArticleforMonthPerCategory(d_metrics):
 
     # Local Variables
 
-    v_TodaysDate = datetime.date.today()
-    v_LastMonthDate = v_TodaysDate + relativedelta(months=-1)
-    v_Months = datetime.date.strftime(v_LastMonthDate,"%Y-%m")
-    d_ArticlesForMonthPerCategory = {}
+    d_ArticlesForMonthPerCategory = d_metrics['last_month_categories']
     x_plot = []
     y_plot = []
 
-    # Loop through the article list to get the number of occurance of a category last month
-
-    for d_category in l_articles:
-            if d_category['created_at'][:7] == str(v_Months) and d_category['category_name'] not in l_CategoryName:
-                Total = d_category['category_name']
-                if Total not in d_ArticlesForMonthPerCategory:
-                    d_ArticlesForMonthPerCategory[Total] = 0
-                if Total in d_ArticlesForMonthPerCategory:
-                    d_ArticlesForMonthPerCategory[Total] += 1
-
-    logger.debug("Total Article Per Category for Last Month: '{}'".format(d_ArticlesForMonthPerCategory))
-
     # Get the values and plot that on a graph
 
     for key, value in d_ArticlesForMonthPerCategory.items():
@@ -948,9 +1504,9 @@ def fn_PlotTotalArticleforMonthPerCategory(l_articles):
             layout=layout
     )
 
-    url_HighestContributedCategoryLastMonth = py.plot(
+    url_HighestContributedCategoryLastMonth = fn_plot(
             fig,
-            filename='Category-with-highest-contribution-last-month'
+            'Category-with-highest-contribution-last-month'
     )
 
     logger.debug("Total Article Per Category for Last Month hosted URL: '{}'".format(
@@ -966,33 +1522,14 @@ def fn_PlotTotalArticleforMonthPerCategory(l_articles):
 # based on articles if its published or its on draft.
 
 
-def fn_PlotTotalArticleforMonthPerAuthor(l_articles, d_UserList):
+def fn_PlotTotalArticleforMonthPerAuthor(d_metrics):
 
     # Local Variables
 
-    v_TodaysDate = datetime.date.today()
-    v_LastMonthDate = v_TodaysDate + relativedelta(months=-1)
-    v_Months = datetime.date.strftime(v_LastMonthDate,"%Y-%m")
-    d_ArticlesForMonthPerAuthor = {}
-    d_ArticlesForMonthPerAuthorName = {}
+    d_ArticlesForMonthPerAuthorName = d_metrics['last_month_authors']
     x_plot = []
     y_plot = []
 
-    # Get the list of articles and count the occurance of the author in the last month
-
-    for d_category in l_articles:
-            if d_category['created_at'][:7] == str(v_Months):
-                Total = d_category['author_id']
-                if Total not in d_ArticlesForMonthPerAuthor:
-                    d_ArticlesForMonthPerAuthor[Total] = 0
-                if Total in d_ArticlesForMonthPerAuthor:
-                    d_ArticlesForMonthPerAuthor[Total] += 1
-
-    for key, value in d_ArticlesForMonthPerAuthor.items():
-        for v_Author in d_UserList:
-            if v_Author['id'] == key:
-                d_ArticlesForMonthPerAuthorName[v_Author['name']] = value
-
     Top10OLastMonthContributor = dict(sorted(d_ArticlesForMonthPerAuthorName.items(), key=itemgetter(1), reverse=True))
 
     logger.debug("Total Article Per Author for the month: '{}'".format(Top10OLastMonthContributor))
@@ -1052,9 +1589,9 @@ def fn_PlotTotalArticleforMonthPerAuthor(l_articles, d_UserList):
             layout=layout
     )
 
-    url_ArticlesForMonthPerAuthorName = py.plot(
+    url_ArticlesForMonthPerAuthorName = fn_plot(
             fig,
-            filename='KB-Top-Contibutors-Last-Month'
+            'KB-Top-Contibutors-Last-Month'
     )
 
     logger.debug("Total Article contributed by Author for Last Month Hosted URL: '{}'".format(
@@ -1069,48 +1606,14 @@ def fn_PlotTotalArticleforMonthPerAuthor(l_articles, d_UserList):
 # based on articles if its published or its on draft.
 
 
-def fn_PlotDraftArticlePerYear(l_articles):
+def fn_PlotDraftArticlePerYear(d_metrics):
 
     # Local Variables
 
-    v_TodaysDate = datetime.datetime.now()
-    v_LastWeekDate = v_TodaysDate + relativedelta(weeks=-1)
-    v_LastMonthDate = v_TodaysDate + relativedelta(months=-1)
-    v_ThreeMonthDate = v_TodaysDate + relativedelta(months=-3)
-    d_DraftArticle = collections.OrderedDict()
-    d_DraftArticle['Less than a week'] = 0
-    d_DraftArticle['Less than a month'] = 0
-    d_DraftArticle['Less than 3 months'] = 0
-    d_DraftArticle['More than 3 months'] = 0
+    d_DraftArticle = d_metrics['draft_age']
     x_plot = []
     y_plot = []
 
-    # From the list of article pick the draft once and increment then based on number days it was open
-
-    for d_category in l_articles:
-        v_stringtodate = datetime.datetime.strptime(d_category['created_at'][:10], '%Y-%m-%d')
-        if v_stringtodate >= v_LastWeekDate and v_stringtodate < v_TodaysDate and d_category['draft'] == True:
-            Total = "Less than a week"
-            if Total in d_DraftArticle:
-                d_DraftArticle[Total] += 1
-
-        if v_stringtodate >= v_LastMonthDate and v_stringtodate < v_LastWeekDate and d_category['draft'] == True:
-            Total = "Less than a month"
-            if Total in d_DraftArticle:
-                d_DraftArticle[Total] += 1
-
-        if v_stringtodate >= v_ThreeMonthDate and v_stringtodate < v_LastMonthDate and d_category['draft'] == True:
-            Total = "Less than 3 months"
-            if Total in d_DraftArticle:
-                d_DraftArticle[Total] += 1
-
-        if v_stringtodate < v_LastMonthDate and d_category['draft'] == True:
-            Total = "More than 3 months"
-            if Total in d_DraftArticle:
-                d_DraftArticle[Total] += 1
-
-    logger.debug("Total Article in Draft mode: '{}'".format(d_DraftArticle))
-
     # Plot the values in the graph
 
     for key, value in d_DraftArticle.items():
@@ -1170,9 +1673,9 @@ def fn_PlotDraftArticlePerYear(l_articles):
             layout=layout
     )
 
-    url_PlotDraftArticle = py.plot(
+    url_PlotDraftArticle = fn_plot(
             fig,
-            filename='KB-Articles-in-draft-mode'
+            'KB-Articles-in-draft-mode'
     )
 
     logger.debug("Total Article in Draft by days Hosted URL: '{}'".format(
@@ -1193,9 +1696,16 @@ def main():
 
     logger.info("Start of the program: '{}'".format(__file__))
 
+    # The local graphs can't be drawn without matplotlib
+
+    if v_RenderBackend == "local" and plt is None:
+        logger.error("matplotlib is needed to draw the graphs locally, install it using \"pip install matplotlib\"")
+        sys.exit(2)
+
     # Local parameters that is used by this function
 
     l_articles = []
+    l_sections = []
     d_UserCount = {}
 
     # Obtain the current date & time
@@ -1205,6 +1715,15 @@ def main():
     logger.info("Get Current date & time: '{}'".format(v_currenttime))
     logger.info("Get Last Month: '{}'".format(v_LastMonth.strftime('%b %Y')))
 
+    # Pass the parameters on to the API client, then set up the connection pool and the compression of the API session
+
+    fn_configure(globals())
+    fn_transport_setup()
+
+    # Open the snapshot store, the data pulled below are saved there
+
+    fn_store_open()
+
     # Call the function to obtain the category ID's
 
     logger.info("Start of the function to gather the categories ID")
@@ -1215,125 +1734,112 @@ def main():
 
     # Call the function fn_get_articles_info() to obtain the articles in the category obtained above
 
-    logger.info("Start of the function to gather the articles in category")
-
-    for d_category_id in l_category:
-        logger.info("Pull data for category: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
-        l_articles += fn_get_articles_info(
-                d_category_id['id'],
-                d_category_id['name']
-        )
-
-        # For the category inside the l_categoryName get the section name as well
-
-        if d_category_id['name'] in l_CategoryName:
-            logger.info("Pull data for section: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
-            l_sections = fn_getSectionName(
-                    d_category_id['id'],
-                    d_category_id['name']
-            )
-            logger.debug("End pulling data from section: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
-
-        logger.debug("End pulling data for category: '{}'".format(d_category_id['name'].encode('ascii', 'ignore')))
-
-    logger.debug("End of the function to gather the articles in category")
-
-    # Get all the agent Users Information
-
-    logger.info("Start of the function to gather the agent User Information")
-
-    l_UserList = fn_UserInfo()
+    # The categories are pulled in parallel ( at most v_MaxCategoryWorkers at a time )
+    # and the results are merged back in the same order as the categories list.
 
-    logger.debug("End of the function to gather the agent User Information")
+    # When the snapshot store has the articles from the last run, only pull the articles changed since then
+    # and read the full article history from the store.
 
-    # Plot the graph for the Total Articles per Month.
+    logger.info("Start of the function to gather the articles in category")
 
-    logger.info("Start of the function to gather the Total articles per Month")
+    v_synctime = int(time.time())
+    v_cursor = None
 
-    v_TotalArticlePerMonth = fn_PlotTotalArticlesPerMonth(
-            l_articles
-    )
+    if zendesk_kb_client.v_StoreConnection is not None:
+        v_cursor = fn_store_get_cursor('analytics_articles')
 
-    logger.debug("End of the function to gather the Total articles per Month")
+    if v_cursor is None:
+        l_categorydata = fn_parallel_map(
+                fn_get_category_data,
+                l_category,
+                v_MaxCategoryWorkers
+        )
 
-    # Plot the graph for the Total Articles per Month per Category.
+        for l_category_articles, l_category_sections in l_categorydata:
+            l_articles += l_category_articles
+            l_sections += l_category_sections
+    else:
+        logger.info("Snapshot store found, get articles changed since: '{}'".format(v_cursor))
 
-    logger.info("Start of the function to gather the Total Articles for Last Month per Category")
+        # The changed articles are only needed on the store, the full history is then read from there
 
-    v_TotalArticleforLastMonthPerCategory = fn_PlotTotalArticleforMonthPerCategory(
-            l_articles
-    )
+        for d_article in fn_get_incremental_articles(l_category, v_cursor):
+            pass
 
-    logger.debug("End of the function to gather the Total Articles for Last Month per Category")
+        d_categoryids = set(category.id for category in l_category)
+        l_articles = [article for article in fn_store_load('articles', Article) if article.category_id in d_categoryids]
 
-    # Plot the graph for the Total Articles per Month per Author.
+        for l_category_sections in fn_parallel_map(fn_get_category_sections, l_category, v_MaxCategoryWorkers):
+            l_sections += l_category_sections
 
-    logger.info("Start of the function to gather the Total Articles for Month per Author")
+    if zendesk_kb_client.v_StoreConnection is not None:
+        fn_store_set_cursor('analytics_articles', v_synctime)
 
-    v_TotalArticleforMonthPerAuthor = fn_PlotTotalArticleforMonthPerAuthor(
-            l_articles,
-            l_UserList
-    )
-
-    logger.debug("End of the function to gather the Total Articles for Month per Author")
+    logger.debug("End of the function to gather the articles in category")
 
-    # Plot the graph for the Total Articles in Draft Mode.
+    # Get all the agent Users Information
 
-    logger.info("Start of the function to gather the Total Articles in Draft Mode")
+    logger.info("Start of the function to gather the agent User Information")
 
-    v_DraftArticlePerYear = fn_PlotDraftArticlePerYear(
-            l_articles
-    )
+    fn_user_cache_load()
+    fn_UserInfo(l_articles)
 
-    logger.debug("End of the function to gather the Total Articles in Draft Mode")
+    logger.debug("End of the function to gather the agent User Information")
 
-    # Plot the graph for the Total Articles per category.
+    # Index the users, sections and categories by id once, to be used by all the plot functions
 
-    logger.info("Start of the function to gather the Overall Total articles per category")
+    logger.info("Start of the function to build the users, sections and categories lookup")
 
-    v_OverallTotalArticlePerCategory = fn_PlotOverallTotalArticlePerCategory(
-            l_articles
+    d_lookups = fn_build_lookups(
+            l_sections,
+            l_category
     )
 
-    logger.debug("End of the function to gather the Overall Total articles per category")
+    logger.debug("End of the function to build the users, sections and categories lookup")
 
-    # Plot the graph for the Total Article Under KM Section.
+    # Calculate the metrics of all the graphs with a single loop through the articles
+    # or on the columns of the articles when numpy is available
 
-    logger.info("Start of the function to gather Total Article Under KM Section")
+    logger.info("Start of the function to calculate the metrics of all the graphs")
 
-    v_TotalArticlePerKMSection = fn_PlotArticleUnderKMSections(
-            l_articles,
-            l_sections
-    )
+    if v_ColumnarBackend and np is not None:
+        d_metrics = fn_aggregate_columns(
+                fn_build_columns(l_articles, d_lookups),
+                d_lookups
+        )
+    else:
+        d_metrics = fn_aggregate_articles(
+                l_articles,
+                d_lookups
+        )
 
-    logger.debug("End of the function to gather  Total Article Under KM Section")
+    logger.debug("End of the function to calculate the metrics of all the graphs")
 
-    # Plot the graph for the overall top 10 KB contributors.
+    # Save the user cache for the next run
 
-    logger.info("Start of the function to gather the Overall Top 10 KB Contributors")
+    fn_user_cache_save()
 
-    v_Top10OverallTopContributor = fn_PlotOverallTopContributors(
-            l_articles,
-            l_UserList
-    )
+    # Plot all the graphs at the same time on a pool of processes ( at most v_MaxPlotProcesses )
+    # All the url ( or file ) to where the graph is plotted, in the same order as the functions.
 
-    logger.debug("End of the function to gather the Overall Top 10 KB Contributors")
+    logger.info("Start of the function to plot all the graphs")
 
-    # All the url to where the graph is plotted.
+    graphs = fn_plot_all([
+        fn_PlotTotalArticlesPerMonth,
+        fn_PlotTotalArticleforMonthPerCategory,
+        fn_PlotTotalArticleforMonthPerAuthor,
+        fn_PlotDraftArticlePerYear,
+        fn_PlotArticleUnderKMSections,
+        fn_PlotOverallTotalArticlePerCategory,
+        fn_PlotOverallTopContributors
+    ], d_metrics)
 
-    graphs = [
-        v_TotalArticlePerMonth,
-        v_TotalArticleforLastMonthPerCategory,
-        v_TotalArticleforMonthPerAuthor,
-        v_DraftArticlePerYear,
-        v_TotalArticlePerKMSection,
-        v_OverallTotalArticlePerCategory,
-        v_Top10OverallTopContributor
-    ]
+    logger.debug("End of the function to plot all the graphs")
 
     # Template for the email body
     # Open the interactive graph when you click on the image
     # Use the ".png" magic url so that the latest, most-up-to-date image is included
+    # The local graphs are attached to the email and the image refers to its attachment ( Content-ID )
 
     template = (''
         '<a href="{graph_url}" target="_blank">'
@@ -1342,13 +1848,19 @@ def main():
         '{caption}'
     '')
 
+    if v_RenderBackend == "local":
+        template = (''
+            '<img src="cid:{graph_url}">'
+            '{caption}'
+        '')
+
     # The Email Body
 
     email_body = ''
 
     for graph in graphs:
         _ = template
-        _ = _.format(graph_url=graph, caption='')
+        _ = _.format(graph_url=os.path.basename(graph) if v_RenderBackend == "local" else graph, caption='')
         email_body += _
 
     # The Header of the Email
@@ -1389,6 +1901,24 @@ def main():
 
     msg.attach(part2)
 
+    # The local graphs are attached as inline images next to the HTML message ( multipart/related )
+
+    if v_RenderBackend == "local":
+        msg_alternative = msg
+        msg = MIMEMultipart('related')
+        for v_header in ('Subject', 'From', 'To'):
+            msg[v_header] = msg_alternative[v_header]
+            del msg_alternative[v_header]
+        msg.attach(msg_alternative)
+
+        for graph in graphs:
+            fob = open(graph, 'rb')
+            part = MIMEImage(fob.read(), 'svg+xml' if v_ChartFormat == "svg" else v_ChartFormat)
+            fob.close()
+            part.add_header('Content-ID', '<{}>'.format(os.path.basename(graph)))
+            part.add_header('Content-Disposition', 'inline', filename=os.path.basename(graph))
+            msg.attach(part)
+
     # Send the message via local SMTP server.
 
     smtplib.SMTP()
@@ -1404,9 +1934,15 @@ def main():
 
     # End program message
 
+    # Log the bytes transferred from the API
+
+    fn_transfer_report()
+
     logger.info("End of the program: '{}'".format(__file__))
 
 # Step 7
 # Call the main function and start the program
+# ( only when run as a program, the plot processes must not start the program again )
 
-main()
+if __name__ == "__main__":
+    main()
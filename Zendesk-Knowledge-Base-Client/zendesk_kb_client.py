@@ -0,0 +1,962 @@
+# -*- coding: utf-8 -*-
+
+#############################################################################################
+#                                 Python module                                             #
+#                       Written with python code version 2.7                                #
+#                                                                                           #
+# The module is the ZenDesk API client shared by the alerts and the analytics programs,     #
+# it paces / retries the API requests, pulls the pages in parallel, caches the responses,   #
+# saves the records on the snapshot store and looks up the users.                           #
+#                                                                                           #
+# Naming convention used:                                                                   #
+#   fn_ = function   ,  v_ = variable                                                       #
+#    l_ = list       ,  d_ = dictionary                                                     #
+#                                                                                           #
+#############################################################################################
+
+
+# Importing modules needed for the module
+# If the import modules fail then install using "pip install <module-name>"
+
+
+import requests
+import json
+import datetime
+import logging
+from collections import namedtuple, OrderedDict
+from email.utils import parsedate_tz, mktime_tz
+import os
+import time
+import sqlite3
+import threading
+import hashlib
+import re
+import zlib
+import codecs
+from multiprocessing.pool import ThreadPool
+
+# brotli is optional, when installed the API responses are also accepted with "br" compression
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Global parameters
+
+# The messages are logged with the logging set up by the program
+
+
+logger = logging.getLogger(__file__)
+
+
+# Parameters : username, password & v_top_level_url
+# The account and the help center the API requests are sent to
+
+
+username = "username"
+password = "password"
+v_top_level_url = "https://discuss.zendesk.com"
+
+
+# Parameters : v_MaxWorkers, v_PageSize, v_RateLimit, v_BucketSize, v_MaxRetries, v_MaxConcurrentRequests,
+#              v_FetchConcurrency, v_PoolMaxSize, v_PoolBlock, v_AcceptEncoding, v_StreamChunkSize, v_SnapshotStore,
+#              v_CacheDir, v_CacheTTL, v_CacheMaxEntries, v_UserCacheFile, v_UserCacheTTL & v_UserCacheMaxEntries
+# The defaults of the client, the programs set them ( see the parameters of the programs for what they do )
+# using fn_configure() before the first API request.
+
+
+v_MaxWorkers = 8
+v_PageSize = 100
+v_RateLimit = 700
+v_BucketSize = 10
+v_MaxRetries = 5
+v_MaxConcurrentRequests = v_MaxWorkers * 4
+v_FetchConcurrency = v_MaxConcurrentRequests
+v_PoolMaxSize = v_FetchConcurrency + 4
+v_PoolBlock = False
+v_AcceptEncoding = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+v_StreamChunkSize = 65536
+v_SnapshotStore = None
+v_CacheDir = None
+v_CacheTTL = 3600
+v_CacheMaxEntries = 1000
+v_UserCacheFile = None
+v_UserCacheTTL = 86400
+v_UserCacheMaxEntries = 10000
+
+l_Parameters = [
+    "username", "password", "v_top_level_url", "v_MaxWorkers", "v_PageSize", "v_RateLimit", "v_BucketSize",
+    "v_MaxRetries", "v_MaxConcurrentRequests", "v_FetchConcurrency", "v_PoolMaxSize", "v_PoolBlock",
+    "v_AcceptEncoding", "v_StreamChunkSize", "v_SnapshotStore", "v_CacheDir", "v_CacheTTL", "v_CacheMaxEntries",
+    "v_UserCacheFile", "v_UserCacheTTL", "v_UserCacheMaxEntries"
+]
+
+
+# The users are kept as compact records ( tuples ) with only the fields used by the programs
+
+
+User = namedtuple('User', ['id', 'name', 'role', 'updated_at'])
+
+
+# The API session, the user name / password are set by fn_configure()
+
+
+zd = requests.session()
+
+
+# Global Functions
+
+# Function : fn_retry_after(response)
+# The seconds to wait given by the Retry-After of the response, either in seconds or as an HTTP date
+# ( 10 seconds when it is missing or can't be read ).
+
+
+def fn_retry_after(response):
+    v_retryafter = response.headers.get('Retry-After')
+    if not v_retryafter:
+        return 10.0
+    try:
+        return max(0.0, float(v_retryafter))
+    except ValueError:
+        pass
+    t_date = parsedate_tz(v_retryafter)
+    if t_date is None:
+        return 10.0
+    return max(0.0, mktime_tz(t_date) - time.time())
+
+
+# Function : fn_throttle_acquire() & fn_throttle_release(response)
+# Wait for a free request slot and a token on the bucket before calling the API / give back the slot after
+# the call and adjust the rate and the concurrency based on the rate limit headers of the response.
+
+
+d_Throttle = {
+    'rate': v_RateLimit / 60.0,
+    'tokens': 1.0,
+    'updated': time.time(),
+    'paused_until': 0,
+    'inflight': 0,
+    'concurrency': v_MaxWorkers
+}
+v_ThrottleCondition = threading.Condition()
+
+
+def fn_throttle_acquire():
+    with v_ThrottleCondition:
+        while d_Throttle['inflight'] >= d_Throttle['concurrency']:
+            v_ThrottleCondition.wait()
+        d_Throttle['inflight'] += 1
+        while True:
+            v_now = time.time()
+            if v_now < d_Throttle['paused_until']:
+                v_ThrottleCondition.wait(d_Throttle['paused_until'] - v_now)
+                continue
+            d_Throttle['tokens'] = min(v_BucketSize, d_Throttle['tokens'] + (v_now - d_Throttle['updated']) * d_Throttle['rate'])
+            d_Throttle['updated'] = v_now
+            if d_Throttle['tokens'] >= 1:
+                d_Throttle['tokens'] -= 1
+                return
+            v_ThrottleCondition.wait((1 - d_Throttle['tokens']) / d_Throttle['rate'])
+
+
+def fn_throttle_release(response):
+    with v_ThrottleCondition:
+        d_Throttle['inflight'] -= 1
+        if response is not None:
+            v_limit = response.headers.get('X-Rate-Limit')
+            v_remaining = response.headers.get('X-Rate-Limit-Remaining')
+            if v_limit:
+                d_Throttle['rate'] = int(v_limit) / 60.0
+            if response.status_code in (429, 503):
+                d_Throttle['concurrency'] = max(1, d_Throttle['concurrency'] // 2)
+                d_Throttle['paused_until'] = time.time() + fn_retry_after(response)
+                d_Throttle['tokens'] = 0
+            elif v_limit and v_remaining:
+                v_headroom = float(v_remaining) / float(v_limit)
+                if v_headroom < 0.1:
+                    d_Throttle['concurrency'] = max(1, d_Throttle['concurrency'] // 2)
+                elif v_headroom > 0.5:
+                    d_Throttle['concurrency'] = min(v_MaxConcurrentRequests, d_Throttle['concurrency'] + 1)
+            logger.debug("API rate limit: '{0}' remaining: '{1}' concurrency: '{2}'".format(
+                v_limit, v_remaining, d_Throttle['concurrency']))
+        v_ThrottleCondition.notify_all()
+
+
+# Function : fn_configure(d_params)
+# Copy the parameters of the program ( eg.s its globals() ) that have the same name as the parameters of
+# the client ( l_Parameters ) on to the client, the user name / password are then set on the API session.
+
+
+def fn_configure(d_params):
+    d_globals = globals()
+    for v_name in l_Parameters:
+        if v_name in d_params:
+            d_globals[v_name] = d_params[v_name]
+    zd.auth = (username, password)
+    with v_ThrottleCondition:
+        d_Throttle['rate'] = v_RateLimit / 60.0
+        d_Throttle['concurrency'] = v_MaxWorkers
+
+
+# Function : fn_transport_setup()
+# Size the connection pool of the session to the threads that call the API ( v_PoolMaxSize ) and ask the API
+# for compressed responses ( v_AcceptEncoding ), the responses are decoded by fn_decode_content().
+
+
+def fn_transport_setup():
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=v_PoolMaxSize, pool_block=v_PoolBlock)
+    zd.mount("https://", adapter)
+    zd.mount("http://", adapter)
+    zd.headers['Accept-Encoding'] = v_AcceptEncoding
+    logger.debug("Connection pool size: '{0}' Accept-Encoding: '{1}'".format(v_PoolMaxSize, v_AcceptEncoding))
+
+
+# Function : fn_decode_content(response, content)
+# Decode the content as sent on the wire ( gzip, deflate or br ) based on the Content-Encoding of the response
+
+
+def fn_decode_content(response, content):
+    v_encoding = response.headers.get('Content-Encoding', '').strip().lower()
+    if not content or v_encoding in ('', 'identity'):
+        return content
+    if v_encoding in ('gzip', 'x-gzip'):
+        return zlib.decompress(content, 16 + zlib.MAX_WBITS)
+    if v_encoding == 'deflate':
+        try:
+            return zlib.decompress(content)
+        except zlib.error:
+            return zlib.decompress(content, -zlib.MAX_WBITS)
+    if v_encoding == 'br' and brotli is not None:
+        return brotli.decompress(content)
+    raise ValueError("Unsupported Content-Encoding: '{}'".format(v_encoding))
+
+
+# Function : fn_transfer_record(url, wire, decoded) & fn_transfer_report()
+# Add up the bytes on the wire and the decoded bytes of every response by endpoint ( the url path
+# with the ids replaced by {id} ) / log the totals of every endpoint at the end of the program.
+
+
+d_TransferStats = {}
+v_TransferLock = threading.Lock()
+
+
+def fn_transfer_record(url, wire, decoded):
+    v_endpoint = re.sub(r'/\d+', '/{id}', re.sub(r'^\w+://[^/]+', '', url.split('?')[0]))
+    with v_TransferLock:
+        l_stats = d_TransferStats.setdefault(v_endpoint, [0, 0, 0])
+        l_stats[0] += 1
+        l_stats[1] += wire
+        l_stats[2] += decoded
+
+
+def fn_transfer_report():
+    with v_TransferLock:
+        l_endpoints = sorted(d_TransferStats.items(), key=lambda t_stats: t_stats[1][1], reverse=True)
+    for v_endpoint, (v_requests, v_wire, v_decoded) in l_endpoints:
+        logger.info("Transfer '{0}': requests: '{1}' bytes on wire: '{2}' decoded: '{3}' saved: '{4:.1f}%'".format(
+            v_endpoint, v_requests, v_wire, v_decoded, 100.0 * (v_decoded - v_wire) / v_decoded if v_decoded else 0.0
+        ))
+
+
+# Function : fn_get_page(url, cache, fields)
+# Get a single page from the API and return its json data
+# When "cache" is True the response is read from / saved to the v_CacheDir ( see fn_cache_read() )
+# When "fields" is given only those keys are kept on the json data ( see fn_json_loads() ), the page is then
+# parsed while it is read ( see fn_json_stream() ) unless it is cached.
+
+
+def fn_get_page(url, cache=False, fields=None):
+    headers = {'Content-Type': 'application/json'}
+    d_cached = None
+    v_stream = fields is not None and not (cache and v_CacheDir is not None)
+
+    if cache and v_CacheDir is not None:
+        d_cached = fn_cache_read(url)
+
+    # The cached response is still fresh, no need to call the API
+
+    if d_cached is not None and time.time() - d_cached['time'] < v_CacheTTL:
+        logger.debug("Reading URL from cache: '{}'".format(url))
+        return fn_json_loads(d_cached['content'], fields)
+
+    # The cached response is old, ask the API to send the content only if it has changed
+
+    if d_cached is not None:
+        if d_cached['etag']:
+            headers['If-None-Match'] = d_cached['etag']
+        if d_cached['last_modified']:
+            headers['If-Modified-Since'] = d_cached['last_modified']
+
+    # Retry the request when the API is throttling us, the wait time is handled by fn_throttle_acquire()
+
+    for v_attempt in range(v_MaxRetries + 1):
+        logger.info("Reading URL: '{}'".format(url))
+        fn_throttle_acquire()
+        response = None
+        try:
+            response = zd.get(url, headers=headers, stream=True)
+            if not (v_stream and response.status_code == 200):
+                v_wirecontent = response.raw.read(decode_content=False)
+        finally:
+            fn_throttle_release(response)
+        if response.status_code not in (429, 503):
+            break
+        logger.warning("API rate limit reached, retrying after '{0}' seconds: '{1}'".format(
+            response.headers.get('Retry-After'), url))
+
+    # Fail with the HTTP error rather than a missing key on the json data
+
+    response.raise_for_status()
+
+    # Parse the page while it is read, only the projected fields of one article are kept at a time
+
+    if v_stream and response.status_code == 200:
+        l_counts = [0, 0]
+        try:
+            data = fn_json_stream(fn_stream_content(response, l_counts), fields)
+        except Exception:
+            response.close()
+            raise
+        fn_transfer_record(url, l_counts[0], l_counts[1])
+        return data
+
+    # Decode the content as sent on the wire and count its bytes
+
+    v_content = fn_decode_content(response, v_wirecontent)
+    fn_transfer_record(url, len(v_wirecontent), len(v_content))
+    v_text = v_content.decode(response.encoding or 'utf-8')
+
+    if d_cached is not None and response.status_code == 304:
+        logger.debug("URL not modified, using the cached response: '{}'".format(url))
+        d_cached['time'] = time.time()
+        fn_cache_write(url, d_cached)
+        return fn_json_loads(d_cached['content'], fields)
+
+    if cache and v_CacheDir is not None and response.status_code == 200:
+        fn_cache_write(url, {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'time': time.time(),
+            'content': v_text
+        })
+
+    return fn_json_loads(v_text, fields)
+
+
+# Function : fn_json_loads(content, fields)
+# Parse the json content, when "fields" is given every json object is projected to those keys as soon as
+# it is decoded, so the unused fields ( like the article body ) are freed straight away instead of being
+# kept around till the whole page is parsed.
+
+
+def fn_json_loads(content, fields=None):
+    if fields is None:
+        return json.loads(content)
+    return json.loads(content, object_pairs_hook=lambda l_pairs: dict(p for p in l_pairs if p[0] in fields))
+
+
+# Function : fn_stream_content(response, l_counts)
+# Read the content of the response v_StreamChunkSize bytes at a time and yield it as text, decoded from the
+# Content-Encoding ( gzip or deflate, the other encodings are decoded in one go by fn_decode_content() ).
+# The bytes on the wire and the decoded bytes are added up on l_counts.
+
+
+def fn_stream_content(response, l_counts):
+    v_encoding = response.headers.get('Content-Encoding', '').strip().lower()
+    textdecoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    decompressor = None
+
+    if v_encoding in ('gzip', 'x-gzip'):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif v_encoding == 'deflate':
+        decompressor = zlib.decompressobj()
+    elif v_encoding not in ('', 'identity'):
+        v_wirecontent = response.raw.read(decode_content=False)
+        v_content = fn_decode_content(response, v_wirecontent)
+        l_counts[0] += len(v_wirecontent)
+        l_counts[1] += len(v_content)
+        yield textdecoder.decode(v_content, True)
+        return
+
+    for v_wirechunk in response.raw.stream(v_StreamChunkSize, decode_content=False):
+        l_counts[0] += len(v_wirechunk)
+        v_pending = v_wirechunk
+
+        # A compressed chunk is decompressed at most v_StreamChunkSize bytes at a time
+
+        while v_pending:
+            if decompressor is None:
+                v_chunk, v_pending = v_pending, None
+            else:
+                try:
+                    v_chunk = decompressor.decompress(v_pending, v_StreamChunkSize)
+                except zlib.error:
+
+                    # Some servers send deflate without the zlib header
+
+                    if v_encoding != 'deflate' or l_counts[1]:
+                        raise
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    continue
+                v_pending = decompressor.unconsumed_tail
+            l_counts[1] += len(v_chunk)
+            yield textdecoder.decode(v_chunk)
+
+    v_chunk = decompressor.flush() if decompressor is not None else b''
+    l_counts[1] += len(v_chunk)
+    yield textdecoder.decode(v_chunk, True)
+
+
+# Function : fn_json_stream(l_chunks, fields)
+# Parse the json object from the text chunks as they are read, the values of the object are decoded one
+# at a time ( one list item at a time for a list ) and projected to "fields" like fn_json_loads().
+# Only the text of the value being decoded is kept, so a page never holds all its article bodies at once.
+
+
+def fn_json_stream(l_chunks, fields):
+
+    # Local Variables
+
+    decoder = json.JSONDecoder(object_pairs_hook=lambda l_pairs: dict(p for p in l_pairs if p[0] in fields))
+    whitespace = re.compile(r'[ \t\n\r]*')
+    chunks = iter(l_chunks)
+    l_buffer = [u'', 0]
+    d_data = {}
+
+    # Read the next chunk, the text already parsed is dropped. Returns False at the end of the content
+
+    def fn_read_more():
+        v_chunk = next(chunks, None)
+        if v_chunk is None:
+            return False
+        l_buffer[0] = l_buffer[0][l_buffer[1]:] + v_chunk
+        l_buffer[1] = 0
+        return True
+
+    # Skip the whitespace and return the next character ( '' at the end of the content ), "consume" moves past it
+
+    def fn_next_char(consume=False):
+        while True:
+            l_buffer[1] = whitespace.match(l_buffer[0], l_buffer[1]).end()
+            if l_buffer[1] < len(l_buffer[0]):
+                v_char = l_buffer[0][l_buffer[1]]
+                l_buffer[1] += consume
+                return v_char
+            if not fn_read_more():
+                return ''
+
+    def fn_expect(l_chars):
+        v_char = fn_next_char(True)
+        if v_char not in l_chars:
+            raise ValueError("Expecting '{0}' at position '{1}' of the json stream".format(l_chars, l_buffer[1]))
+        return v_char
+
+    # A value that ends with the text read so far may be cut ( eg.s "12" of "12.5" ), read more text before taking it
+
+    def fn_next_value():
+        fn_next_char()
+        while True:
+            try:
+                value, v_end = decoder.raw_decode(l_buffer[0], l_buffer[1])
+                if v_end < len(l_buffer[0]) and l_buffer[0][v_end] not in "0123456789.eE+-":
+                    l_buffer[1] = v_end
+                    return value
+            except ValueError:
+                pass
+            if not fn_read_more():
+                value, v_end = decoder.raw_decode(l_buffer[0], l_buffer[1])
+                l_buffer[1] = v_end
+                return value
+
+    fn_expect('{')
+    if fn_next_char() == '}':
+        return d_data
+
+    while True:
+        v_key = fn_next_value()
+        fn_expect(':')
+
+        # The lists ( eg.s the articles ) are decoded one item at a time
+
+        if fn_next_char() == '[':
+            fn_expect('[')
+            l_values = []
+            if fn_next_char() == ']':
+                fn_expect(']')
+            else:
+                while True:
+                    l_values.append(fn_next_value())
+                    if fn_expect(',]') == ']':
+                        break
+            value = l_values
+        else:
+            value = fn_next_value()
+
+        if v_key in fields:
+            d_data[v_key] = value
+
+        if fn_expect(',}') == '}':
+            return d_data
+
+
+# Function : fn_fetch_engine()
+# Returns the fetch engine ( the pool of v_FetchConcurrency threads ) that is started on its first use.
+# The threads share the keep-alive connections of the session ( see fn_transport_setup() ).
+
+
+v_FetchEngine = None
+v_FetchEngineLock = threading.Lock()
+
+
+def fn_fetch_engine():
+    global v_FetchEngine
+    with v_FetchEngineLock:
+        if v_FetchEngine is None:
+            logger.debug("Starting the fetch engine with '{}' threads".format(v_FetchConcurrency))
+            v_FetchEngine = ThreadPool(v_FetchConcurrency)
+    return v_FetchEngine
+
+
+# Function : fn_fetch_engine_stop()
+# Wait for the fetch engine threads to end and close the keep-alive connections of the session,
+# needed before forking ( eg.s the plot processes of the analytics ) so no thread or socket is copied to the new processes.
+# The engine is started again on the next use.
+
+
+def fn_fetch_engine_stop():
+    global v_FetchEngine
+    with v_FetchEngineLock:
+        if v_FetchEngine is not None:
+            logger.debug("Stopping the fetch engine")
+            v_FetchEngine.close()
+            v_FetchEngine.join()
+            v_FetchEngine = None
+    zd.close()
+
+
+# Function : fn_get_page_async(url, cache, fields) & fn_get_pages_async(l_urls, cache, fields)
+# Same as fn_get_page() but the page is requested on the fetch engine and the call returns at once,
+# the json data is then read with .get() on the returned result ( it waits for the page if not done yet ).
+
+
+def fn_get_page_async(url, cache=False, fields=None):
+    return fn_fetch_engine().apply_async(fn_get_page, (url, cache, fields))
+
+
+def fn_get_pages_async(l_urls, cache=False, fields=None):
+    return [fn_get_page_async(url, cache, fields) for url in l_urls]
+
+
+# Function : fn_get_pages(l_urls, cache, fields)
+# Get all the pages on the list in parallel on the fetch engine and wait for all of them
+# The json data is returned in the same order as the urls on the list.
+
+
+def fn_get_pages(l_urls, cache=False, fields=None):
+    return [result.get() for result in fn_get_pages_async(l_urls, cache, fields)]
+
+
+# Function : fn_iter_pages(url, cache, cursor, fields)
+# Loops through all the pages under a url and yields the json data of every page in order.
+# The first page gives both its data and the total pages, the rest of the pages are then fetched in parallel
+# in batches of v_MaxWorkers pages.
+# When "cursor" is True the API cursor pagination is used instead, following the "links.next" url.
+
+
+def fn_add_query(url, query):
+    return url + ("&" if "?" in url else "?") + query
+
+
+def fn_iter_pages(url, cache=False, cursor=False, fields=None):
+    if cursor:
+        v_pageurl = fn_add_query(url, "page[size]=" + str(v_PageSize))
+        while v_pageurl is not None:
+            data = fn_get_page(v_pageurl, cache, fields)
+            yield data
+            if data.get('meta', {}).get('has_more'):
+                v_pageurl = data['links']['next']
+            else:
+                v_pageurl = None
+        return
+
+    v_pageurl = fn_add_query(url, "per_page=" + str(v_PageSize))
+    data = fn_get_page(fn_add_query(v_pageurl, "page=1"), cache, fields)
+    yield data
+
+    if data.get('page_count'):
+        logger.debug("Total pages: '{0}' on URL: '{1}'".format(data['page_count'], url))
+        l_pageurls = [fn_add_query(v_pageurl, "page=" + str(v_page)) for v_page in range(2, data['page_count'] + 1)]
+
+        # Only v_MaxWorkers pages are fetched ( and held in memory ) at a time
+
+        for v_index in range(0, len(l_pageurls), v_MaxWorkers):
+            for data in fn_get_pages(l_pageurls[v_index:v_index + v_MaxWorkers], cache, fields):
+                yield data
+    else:
+        while data.get('next_page'):
+            data = fn_get_page(data['next_page'], cache, fields)
+            yield data
+
+
+# Function : fn_parallel_map(fn, l_items, workers)
+# Call the function on every item of the list using a pool of at most "workers" threads
+# The results are returned in the same order as the items on the list.
+
+
+def fn_parallel_map(fn, l_items, workers):
+    if len(l_items) <= 1 or workers <= 1:
+        return [fn(item) for item in l_items]
+    pool = ThreadPool(min(workers, len(l_items)))
+    try:
+        return pool.map(fn, l_items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+# Function : fn_parse_time(v_time)
+# Change the Zendesk time "YYYY-MM-DDTHH:MM:SSZ" ( UTC ) to datetime, the format is fixed
+# so the fields are read by their position which is much faster than dateutil.parser.parse().
+# The snapshot store format "YYYY-MM-DD HH:MM:SS" has the same positions and is read the same way.
+
+
+def fn_parse_time(v_time):
+    if not v_time:
+        return None
+    return datetime.datetime(
+        int(v_time[0:4]), int(v_time[5:7]), int(v_time[8:10]),
+        int(v_time[11:13]), int(v_time[14:16]), int(v_time[17:19])
+    )
+
+
+# Function : fn_make_record(record, d_data)
+# Build the record ( eg.s User below or the Article, Category & Section of the programs ) from the API / stored dictionary,
+# only the fields of the record are picked, missing fields are set to None.
+# The time fields ( l_TimeFields ) are changed to datetime here, so they are parsed only once.
+
+
+l_TimeFields = set(['created_at', 'updated_at'])
+
+
+def fn_make_record(record, d_data):
+    return record._make(
+        fn_parse_time(d_data.get(v_field)) if v_field in l_TimeFields else d_data.get(v_field)
+        for v_field in record._fields
+    )
+
+
+# Function : fn_store_open()
+# Open the snapshot store ( v_SnapshotStore ) and create the tables if they don't exist
+# Every table saves the json of the record keyed by its id along with its updated_at time.
+
+
+l_StoreTables = ["articles", "users", "categories", "sections", "translations"]
+v_StoreConnection = None
+v_StoreLock = threading.Lock()
+
+
+def fn_store_open():
+    global v_StoreConnection
+    if v_SnapshotStore is None:
+        return None
+    logger.info("Opening the snapshot store: '{}'".format(v_SnapshotStore))
+    v_StoreConnection = sqlite3.connect(v_SnapshotStore, check_same_thread=False)
+    for v_table in l_StoreTables:
+        v_StoreConnection.execute(
+            "CREATE TABLE IF NOT EXISTS {0} (id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT)".format(v_table)
+        )
+    v_StoreConnection.execute("CREATE TABLE IF NOT EXISTS cursors (name TEXT PRIMARY KEY, value INTEGER)")
+    v_StoreConnection.commit()
+    return v_StoreConnection
+
+
+# Function : fn_store_upsert(table, l_records)
+# Save the records on to the table of the snapshot store, only the records that are new or whose
+# updated_at has changed since the last save are written. Returns the number of records written.
+
+
+def fn_store_upsert(table, l_records):
+    if v_StoreConnection is None or not l_records:
+        return 0
+    with v_StoreLock:
+        d_stored = {}
+        l_ids = [record.id for record in l_records]
+        for v_index in range(0, len(l_ids), 500):
+            l_batch = l_ids[v_index:v_index + 500]
+            d_stored.update(v_StoreConnection.execute(
+                "SELECT id, updated_at FROM {0} WHERE id IN ({1})".format(table, ",".join("?" * len(l_batch))),
+                l_batch
+            ).fetchall())
+        l_changed = [
+            (record.id, str(record.updated_at), json.dumps(record._asdict(), default=str))
+            for record in l_records
+            if record.id not in d_stored or d_stored[record.id] != str(record.updated_at)
+        ]
+        v_StoreConnection.executemany(
+            "INSERT OR REPLACE INTO {0} (id, updated_at, data) VALUES (?, ?, ?)".format(table),
+            l_changed
+        )
+        v_StoreConnection.commit()
+    logger.debug("Snapshot store '{0}' records written: '{1}' of '{2}'".format(table, len(l_changed), len(l_records)))
+    return len(l_changed)
+
+
+# Function : fn_store_load(table, record)
+# Get all the records saved on the table of the snapshot store as "record" tuples.
+
+
+def fn_store_load(table, record):
+    with v_StoreLock:
+        return [fn_make_record(record, json.loads(v_data)) for (v_data,) in v_StoreConnection.execute(
+            "SELECT data FROM {0} ORDER BY id".format(table)
+        )]
+
+
+# Function : fn_store_get(table, record, l_ids)
+# Get the records of the ids from the table of the snapshot store as a dictionary indexed by the id,
+# the ids not on the store are missing from the dictionary ( its empty when there is no store ).
+
+
+def fn_store_get(table, record, l_ids):
+    d_records = {}
+    if v_StoreConnection is None:
+        return d_records
+    with v_StoreLock:
+        for v_index in range(0, len(l_ids), 500):
+            l_batch = l_ids[v_index:v_index + 500]
+            for (v_data,) in v_StoreConnection.execute(
+                "SELECT data FROM {0} WHERE id IN ({1})".format(table, ",".join("?" * len(l_batch))),
+                l_batch
+            ):
+                stored = fn_make_record(record, json.loads(v_data))
+                d_records[stored.id] = stored
+    return d_records
+
+
+# Function : fn_store_get_cursor(name) & fn_store_set_cursor(name, value)
+# Read / Save a named cursor ( eg.s the time of the last sync ) on the snapshot store
+
+
+def fn_store_get_cursor(name):
+    with v_StoreLock:
+        row = v_StoreConnection.execute("SELECT value FROM cursors WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def fn_store_set_cursor(name, value):
+    with v_StoreLock:
+        v_StoreConnection.execute("INSERT OR REPLACE INTO cursors (name, value) VALUES (?, ?)", (name, value))
+        v_StoreConnection.commit()
+
+
+# Function : fn_cache_read(url) & fn_cache_write(url, d_cached)
+# Read / Save the cached response of the url from / to v_CacheDir
+# The cached response is a dictionary with the ETag, Last-Modified, the time it was saved and the content.
+
+
+def fn_cache_path(url):
+    return os.path.join(v_CacheDir, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".json")
+
+
+def fn_cache_read(url):
+    v_cachefile = fn_cache_path(url)
+    try:
+        fob = open(v_cachefile, 'r')
+        d_cached = json.load(fob)
+        fob.close()
+    except (IOError, OSError, ValueError):
+        return None
+    # Mark the response as recently used, the eviction removes the least recently used first
+    os.utime(v_cachefile, None)
+    return d_cached
+
+
+def fn_cache_write(url, d_cached):
+    # The folder may already be there ( eg.s created by the template cache ), it is made owner-only as well
+
+    try:
+        if not os.path.isdir(v_CacheDir):
+            os.makedirs(v_CacheDir, 0o700)
+        os.chmod(v_CacheDir, 0o700)
+    except OSError:
+        pass
+    v_cachefile = fn_cache_path(url)
+    v_tempfile = v_cachefile + "." + str(threading.current_thread().ident) + ".tmp"
+    fob = os.fdopen(os.open(v_tempfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w')
+    json.dump(d_cached, fob)
+    fob.close()
+    os.rename(v_tempfile, v_cachefile)
+    fn_cache_evict()
+
+
+# Function : fn_cache_evict()
+# Remove the least recently used responses when there are more than v_CacheMaxEntries on v_CacheDir
+# The fetch engine threads evict at the same time, a file removed by another thread is skipped.
+
+
+def fn_cache_evict():
+    l_cachefiles = []
+    for v_name in os.listdir(v_CacheDir):
+        if not v_name.endswith(".json"):
+            continue
+        v_cachefile = os.path.join(v_CacheDir, v_name)
+        try:
+            l_cachefiles.append((os.path.getmtime(v_cachefile), v_cachefile))
+        except OSError:
+            pass
+    if len(l_cachefiles) <= v_CacheMaxEntries:
+        return
+    l_cachefiles = [v_cachefile for v_mtime, v_cachefile in sorted(l_cachefiles)]
+    for v_cachefile in l_cachefiles[:len(l_cachefiles) - v_CacheMaxEntries]:
+        logger.debug("Evicting cached response: '{}'".format(v_cachefile))
+        try:
+            os.remove(v_cachefile)
+        except OSError:
+            pass
+
+
+# Function : fn_user_cache_load() & fn_user_cache_save()
+# Read / Save the users of the user cache from / to the v_UserCacheFile so that the next run starts with them,
+# the users are saved from the least to the most recently used. Users older than v_UserCacheTTL seconds are not read.
+
+
+v_UserCache = OrderedDict()
+v_UserPending = set()
+v_UserInflight = {}
+v_UserMissing = set()
+v_UserLock = threading.Lock()
+
+
+def fn_user_cache_load():
+    if v_UserCacheFile is None:
+        return v_UserCache
+    try:
+        fob = open(v_UserCacheFile, 'r')
+        l_cached = json.load(fob)
+        fob.close()
+    except (IOError, OSError, ValueError):
+        return v_UserCache
+    if not isinstance(l_cached, list):
+        return v_UserCache
+    v_now = time.time()
+    fn_user_cache_put(
+        [fn_make_record(User, d_user) for d_user, v_cachedtime in l_cached if v_now - v_cachedtime < v_UserCacheTTL],
+        [v_cachedtime for d_user, v_cachedtime in l_cached if v_now - v_cachedtime < v_UserCacheTTL]
+    )
+    logger.debug("Users read from the user cache: '{}'".format(len(v_UserCache)))
+    return v_UserCache
+
+
+def fn_user_cache_save():
+    if v_UserCacheFile is None or not v_UserCache:
+        return
+    v_cachedir = os.path.dirname(v_UserCacheFile)
+    if v_cachedir and not os.path.isdir(v_cachedir):
+        try:
+            os.makedirs(v_cachedir, 0o700)
+        except OSError:
+            pass
+    with v_UserLock:
+        l_cached = [(user._asdict(), v_cachedtime) for user, v_cachedtime in v_UserCache.values()]
+    v_tempfile = v_UserCacheFile + ".tmp"
+    try:
+        fob = os.fdopen(os.open(v_tempfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w')
+        json.dump(l_cached, fob, default=str)
+        fob.close()
+        os.rename(v_tempfile, v_UserCacheFile)
+    except (IOError, OSError) as e:
+        logger.warning("Unable to save the user cache: '{}'".format(e))
+        return
+    logger.debug("Users saved on the user cache: '{}'".format(len(l_cached)))
+
+
+# Function : fn_user_cache_put(l_users, l_cachedtimes=None)
+# Add the users to the user cache as the most recently used, only the v_UserCacheMaxEntries most recently
+# used users are kept. The users are saved with the time they were requested ( now, if not given ).
+
+
+def fn_user_cache_put(l_users, l_cachedtimes=None):
+    if l_cachedtimes is None:
+        l_cachedtimes = [time.time()] * len(l_users)
+    with v_UserLock:
+        for user, v_cachedtime in zip(l_users, l_cachedtimes):
+            v_UserCache.pop(user.id, None)
+            v_UserCache[user.id] = (user, v_cachedtime)
+            v_UserMissing.discard(user.id)
+        while len(v_UserCache) > v_UserCacheMaxEntries:
+            v_UserCache.popitem(last=False)
+
+
+# Function : fn_user_want(l_ids)
+# Mark the user ids that will be looked up later by fn_get_user(), nothing is requested here.
+# The first user that is not on the user cache then requests all the marked users at once.
+
+
+def fn_user_want(l_ids):
+    with v_UserLock:
+        for v_id in l_ids:
+            if v_id is not None and v_id not in v_UserCache and v_id not in v_UserInflight and v_id not in v_UserMissing:
+                v_UserPending.add(v_id)
+
+
+# Function : fn_get_user(v_id)
+# Returns the User of the id ( None if there is no such user ), the user is only requested from the API
+# the first time it is looked up. The request also gets all the users marked by fn_user_want(),
+# when another thread is already requesting the user it waits for that request instead of sending its own.
+
+
+def fn_get_user(v_id):
+    if v_id is None:
+        return None
+
+    with v_UserLock:
+        if v_id in v_UserCache:
+            t_cached = v_UserCache.pop(v_id)
+            v_UserCache[v_id] = t_cached
+            return t_cached[0]
+        if v_id in v_UserMissing:
+            return None
+        l_batch = None
+        t_inflight = v_UserInflight.get(v_id)
+        if t_inflight is None:
+            v_UserPending.add(v_id)
+            l_batch = sorted(v_UserPending)
+            v_UserPending.clear()
+            t_inflight = (threading.Event(), {})
+            for v_batchid in l_batch:
+                v_UserInflight[v_batchid] = t_inflight
+
+    v_event, d_found = t_inflight
+    if l_batch is None:
+        v_event.wait()
+        return d_found.get(v_id)
+
+    try:
+        d_found.update(fn_fetch_users(l_batch))
+        with v_UserLock:
+            v_UserMissing.update(v_batchid for v_batchid in l_batch if v_batchid not in d_found)
+    finally:
+        with v_UserLock:
+            for v_batchid in l_batch:
+                del v_UserInflight[v_batchid]
+        v_event.set()
+    return d_found.get(v_id)
+
+
+# Function : fn_fetch_users(l_ids)
+# Request the users of the ids from the API using show_many ( 100 ids per request, the requests are run in
+# parallel ), they are added to the user cache and the snapshot store. Returns the users indexed by the id.
+
+
+def fn_fetch_users(l_ids):
+    logger.debug("Users requested with show_many: '{}'".format(len(l_ids)))
+    l_urls = [
+        fn_add_query(v_top_level_url + "/api/v2/users/show_many.json", "ids=" + ",".join(str(v_id) for v_id in l_ids[v_index:v_index + 100]))
+        for v_index in range(0, len(l_ids), 100)
+    ]
+    l_users = [fn_make_record(User, d_user) for data in fn_get_pages(l_urls) for d_user in data['users']]
+    fn_user_cache_put(l_users)
+    fn_store_upsert('users', l_users)
+    return dict((user.id, user) for user in l_users)
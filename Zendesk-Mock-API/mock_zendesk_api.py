@@ -0,0 +1,617 @@
+# -*- coding: utf-8 -*-
+
+#############################################################################################
+#                                 Python program                                            #
+#                       Written with python code version 2.7 ( runs on 3.x too )            #
+#                                                                                           #
+# The program is a local stand-in for the ZenDesk help center API, it serves synthetic      #
+# users, categories, sections and articles ( with translations ) so that the alerts and     #
+# the analytics programs can be run and timed offline. It can also record the responses     #
+# of the real help center as fixtures and replay them.                                      #
+#                                                                                           #
+# Naming convention used:                                                                   #
+#   fn_ = function   ,  v_ = variable                                                       #
+#    l_ = list       ,  d_ = dictionary                                                     #
+#                                                                                           #
+#############################################################################################
+
+
+# Importing modules needed for the program
+# Only the standard library is used, the same module has a different name on python 2 and 3
+
+
+import json
+import logging
+import sys, getopt
+import os
+import re
+import time
+import threading
+import hashlib
+import zlib
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+    from urllib2 import Request, urlopen, HTTPError
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+
+
+# Global parameters
+
+# Set up a logging process
+# Format of logging message on the screen " time [logging level] message "
+
+
+formats = '%(asctime)s [%(levelname)s] %(message)s'
+logger = logging.getLogger(__file__)
+
+
+# Parameters : v_Port
+# The port the server listens on ( on 127.0.0.1 ), set v_top_level_url = "http://127.0.0.1:<v_Port>"
+# on the alerts / analytics program to use this server instead of the help center.
+
+
+v_Port = 8765
+
+
+# Parameters : v_Users, v_AgentEvery, v_Categories, v_SectionsPerCategory, v_ArticlesPerSection, v_Locales & v_BodySize
+# The size of the synthetic help center, every v_AgentEvery user is an agent ( the rest are end-users ).
+# The first category is "Knowledge Space" and the first three sections of every category are the KM review sections.
+# Every article has a translation for each of v_Locales, its body ( and every translation body ) is v_BodySize long.
+
+
+v_Users = 500
+v_AgentEvery = 5
+v_Categories = 5
+v_SectionsPerCategory = 3
+v_ArticlesPerSection = 200
+v_Locales = ["en-us", "fr"]
+v_BodySize = 2000
+
+
+# Parameters : v_Now
+# The time ( seconds since epoch ) the synthetic data is created from, the articles are spread over the 400 days
+# before it. Set it to a fixed time to serve the same data on every run, None is the time the server starts.
+
+
+v_Now = None
+
+
+# Parameters : v_Latency, v_RateLimit & v_RateLimitEvery
+# v_Latency is the time ( in milliseconds ) every request waits before it is answered.
+# The rate limit headers ( X-Rate-Limit / X-Rate-Limit-Remaining ) are sent for v_RateLimit requests a minute,
+# every v_RateLimitEvery request is answered with "429 Too Many Requests" and a Retry-After of v_RetryAfter
+# seconds ( also when the v_RateLimit of the current minute is used up ). Set v_RateLimitEvery to 0 to turn it off.
+
+
+v_Latency = 0
+v_RateLimit = 700
+v_RateLimitEvery = 0
+v_RetryAfter = 1
+
+
+# Parameters : v_Compress
+# The responses are sent with gzip when the request accepts it ( Accept-Encoding ), set to False to always send them as is
+
+
+v_Compress = True
+
+
+# Parameters : v_RecordDir, v_Upstream & v_ReplayDir
+# With v_RecordDir every request is sent to the real help center v_Upstream ( eg.s "https://discuss.zendesk.com",
+# the Authorization of the request is passed on ) and the response is saved as a fixture on v_RecordDir.
+# With v_ReplayDir the responses are read from the fixtures saved there ( 404 for a request that was not recorded ).
+# The synthetic data is served when both are None.
+
+
+v_RecordDir = None
+v_Upstream = None
+v_ReplayDir = None
+
+
+# Function: fn_server_args
+# Read the options of the program, they override the parameters above.
+
+
+def fn_server_args(argv):
+    global v_Port, v_Users, v_Categories, v_SectionsPerCategory, v_ArticlesPerSection, v_Locales, v_BodySize
+    global v_Now, v_Latency, v_RateLimitEvery, v_Compress, v_RecordDir, v_Upstream, v_ReplayDir
+    v_usage = ("{0} [-d] [-p port] [--users N] [--categories N] [--sections N] [--articles N] [--locales en-us,fr] "
+               "[--body-size N] [--now epoch] [--latency ms] [--rate-limit-every N] [--no-compress] "
+               "[--record dir --upstream url] [--replay dir]").format(__file__)
+    try:
+        opts, args = getopt.getopt(argv, "hdp:", [
+            "help", "debug", "port=", "users=", "categories=", "sections=", "articles=", "locales=", "body-size=",
+            "now=", "latency=", "rate-limit-every=", "no-compress", "record=", "upstream=", "replay="
+        ])
+    except getopt.GetoptError:
+        print ("Invalid Option, Use the below command to run the server")
+        print (v_usage)
+        sys.exit(2)
+    v_level = logging.INFO
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print (v_usage)
+            sys.exit(2)
+        elif opt in ("-d", "--debug"):
+            v_level = logging.DEBUG
+        elif opt in ("-p", "--port"):
+            v_Port = int(arg)
+        elif opt == "--users":
+            v_Users = int(arg)
+        elif opt == "--categories":
+            v_Categories = int(arg)
+        elif opt == "--sections":
+            v_SectionsPerCategory = int(arg)
+        elif opt == "--articles":
+            v_ArticlesPerSection = int(arg)
+        elif opt == "--locales":
+            v_Locales = arg.split(",")
+        elif opt == "--body-size":
+            v_BodySize = int(arg)
+        elif opt == "--now":
+            v_Now = int(arg)
+        elif opt == "--latency":
+            v_Latency = int(arg)
+        elif opt == "--rate-limit-every":
+            v_RateLimitEvery = int(arg)
+        elif opt == "--no-compress":
+            v_Compress = False
+        elif opt == "--record":
+            v_RecordDir = arg
+        elif opt == "--upstream":
+            v_Upstream = arg.rstrip("/")
+        elif opt == "--replay":
+            v_ReplayDir = arg
+    logging.basicConfig(format=formats, level=v_level)
+    if v_RecordDir is not None and v_Upstream is None:
+        print ("--record needs the help center url on --upstream")
+        sys.exit(2)
+
+
+# Step 1:
+# Build the synthetic help center
+# Function : fn_format_time(v_time)
+# Change the time ( seconds since epoch ) to the Zendesk time "YYYY-MM-DDTHH:MM:SSZ" ( UTC )
+
+
+def fn_format_time(v_time):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(v_time))
+
+
+# Function : fn_build_data(v_now)
+# Create the users, categories, sections and articles, the data only depends on the parameters and v_now
+# so the same parameters always give the same help center. The keys starting with "_" are not sent.
+
+
+def fn_build_data(v_now):
+
+    # Local variables
+
+    d_data = {"users": [], "categories": [], "sections": [], "articles": []}
+    l_sectionnames = ["KM Review", "SME Review", "First Draft"]
+    l_agents = []
+
+    for v_index in range(1, v_Users + 1):
+        v_role = "agent" if v_index % v_AgentEvery == 0 else "end-user"
+        if v_role == "agent":
+            l_agents.append(v_index)
+        d_data['users'].append({
+            "id": v_index,
+            "name": "User {}".format(v_index),
+            "email": "user{}@example.com".format(v_index),
+            "role": v_role,
+            "created_at": fn_format_time(v_now - 86400 * 500),
+            "updated_at": fn_format_time(v_now - 86400 * (v_index % 30))
+        })
+    l_agents = l_agents or [1]
+
+    v_articleid = 1000000
+    for v_category in range(v_Categories):
+        v_categoryid = 100 + v_category
+        d_data['categories'].append({
+            "id": v_categoryid,
+            "name": "Knowledge Space" if v_category == 0 else "Product {} Knowledge Base".format(v_category),
+            "description": "Category {}".format(v_category),
+            "locale": "en-us",
+            "position": v_category,
+            "created_at": fn_format_time(v_now - 86400 * 500),
+            "updated_at": fn_format_time(v_now - 86400 * (v_category + 1))
+        })
+
+        for v_section in range(v_SectionsPerCategory):
+            v_sectionid = 1000 + v_category * 100 + v_section
+            d_data['sections'].append({
+                "id": v_sectionid,
+                "name": l_sectionnames[v_section] if v_section < len(l_sectionnames) else "Section {}".format(v_section),
+                "category_id": v_categoryid,
+                "locale": "en-us",
+                "position": v_section,
+                "created_at": fn_format_time(v_now - 86400 * 500),
+                "updated_at": fn_format_time(v_now - 86400 * (v_section + 1))
+            })
+
+            # The articles are spread over the last 400 days, every translation is updated a few hours apart
+
+            for v_article in range(v_ArticlesPerSection):
+                v_articleid += 1
+                v_updated = v_now - 86400 * ((v_articleid * 37) % 400) - 60 * (v_articleid % 60)
+                l_translations = [
+                    {
+                        "id": v_articleid * 100 + v_locale,
+                        "source_id": v_articleid,
+                        "source_type": "Article",
+                        "locale": v_Locales[v_locale],
+                        "title": "Article {}".format(v_articleid),
+                        "draft": False,
+                        "created_at": fn_format_time(v_updated - 86400 * 30),
+                        "updated_at": fn_format_time(v_updated - 3600 * ((v_articleid + v_locale) % 5)),
+                        "updated_by_id": l_agents[(v_articleid + v_locale) % len(l_agents)],
+                        "created_by_id": l_agents[v_articleid % len(l_agents)],
+                        "body": "<p>" + "t" * v_BodySize + "</p>"
+                    }
+                    for v_locale in range(len(v_Locales))
+                ]
+                d_data['articles'].append({
+                    "id": v_articleid,
+                    "url": "/api/v2/help_center/articles/{}.json".format(v_articleid),
+                    "html_url": "/hc/en-us/articles/{}".format(v_articleid),
+                    "name": "Article {}".format(v_articleid),
+                    "title": "Article {}".format(v_articleid),
+                    "author_id": l_agents[v_articleid % len(l_agents)],
+                    "section_id": v_sectionid,
+                    "draft": v_articleid % 4 == 0,
+                    "locale": "en-us",
+                    "source_locale": "en-us",
+                    "outdated": False,
+                    "created_at": fn_format_time(v_updated - 86400 * 30),
+                    "updated_at": fn_format_time(v_updated),
+                    "edited_at": fn_format_time(v_updated),
+                    "body": "<p>" + "b" * v_BodySize + "</p>",
+                    "translations": l_translations,
+                    "_category_id": v_categoryid,
+                    "_updated": int(v_updated)
+                })
+
+    logger.info("Synthetic help center: '{0}' users, '{1}' categories, '{2}' sections, '{3}' articles".format(
+        len(d_data['users']), len(d_data['categories']), len(d_data['sections']), len(d_data['articles'])))
+
+    return d_data
+
+
+# Step 2:
+# The API endpoints
+# Function : fn_paginate(l_items, key, d_query, v_pageurl)
+# Return the page of the items asked by the "page" & "per_page" query with the page_count / next_page like the API,
+# when the query has "page[size]" the cursor pagination ( meta.has_more & links.next ) is used instead.
+
+
+def fn_paginate(l_items, key, d_query, v_pageurl):
+    if 'page[size]' in d_query:
+        v_size = min(100, int(d_query['page[size]'][0]))
+        v_after = int(d_query.get('page[after]', ["0"])[0])
+        l_page = [d_item for d_item in l_items if d_item['id'] > v_after][:v_size]
+        v_more = bool(l_page) and l_page[-1]['id'] < l_items[-1]['id']
+        l_query = sorted((v_key, l_values[0]) for v_key, l_values in d_query.items() if not v_key.startswith('page['))
+        l_query += [('page[size]', v_size), ('page[after]', l_page[-1]['id'] if l_page else v_after)]
+        return {
+            key: l_page,
+            "meta": {"has_more": v_more, "after_cursor": str(l_page[-1]['id']) if l_page else None},
+            "links": {
+                "next": v_pageurl + "?" + "&".join("{0}={1}".format(*t_query) for t_query in l_query) if v_more else None
+            }
+        }
+
+    v_perpage = min(100, int(d_query.get('per_page', ["30"])[0]))
+    v_page = int(d_query.get('page', ["1"])[0])
+    v_pagecount = max(1, (len(l_items) + v_perpage - 1) // v_perpage)
+    l_query = sorted((v_key, l_values[0]) for v_key, l_values in d_query.items() if v_key != 'page')
+
+    def fn_page_url(v_number):
+        return v_pageurl + "?" + "&".join("{0}={1}".format(*t_query) for t_query in l_query + [('page', v_number)])
+
+    return {
+        key: l_items[(v_page - 1) * v_perpage:v_page * v_perpage],
+        "page": v_page,
+        "per_page": v_perpage,
+        "page_count": v_pagecount,
+        "count": len(l_items),
+        "next_page": fn_page_url(v_page + 1) if v_page < v_pagecount else None,
+        "previous_page": fn_page_url(v_page - 1) if v_page > 1 else None
+    }
+
+
+# Function : fn_public_article(d_article, include_translations)
+# The article as sent by the API, without the "_" keys and with its translations only when they are included
+
+
+def fn_public_article(d_article, include_translations):
+    return dict(
+        (v_key, v_value) for v_key, v_value in d_article.items()
+        if not v_key.startswith("_") and (include_translations or v_key != "translations")
+    )
+
+
+# Function : fn_route_request(v_path, d_query, v_base)
+# Find the endpoint of the path and return its json data, None when there is no such endpoint
+
+
+def fn_route_request(v_path, d_query, v_base):
+    v_pageurl = v_base + v_path
+
+    if v_path == "/api/v2/users.json":
+        l_users = d_Data['users']
+        if 'role' in d_query:
+            l_users = [d_user for d_user in l_users if d_user['role'] == d_query['role'][0]]
+        return fn_paginate(l_users, "users", d_query, v_pageurl)
+
+    if v_path == "/api/v2/users/show_many.json":
+        l_ids = set(int(v_id) for v_id in d_query.get('ids', [""])[0].split(",") if v_id)
+        return {"users": [d_user for d_user in d_Data['users'] if d_user['id'] in l_ids][:100]}
+
+    if re.match(r"^/api/v2/help_center/(?:[a-z-]+/)?categories\.json$", v_path):
+        return fn_paginate(d_Data['categories'], "categories", d_query, v_pageurl)
+
+    if re.match(r"^/api/v2/help_center/(?:[a-z-]+/)?sections\.json$", v_path):
+        return fn_paginate(d_Data['sections'], "sections", d_query, v_pageurl)
+
+    match = re.match(r"^/api/v2/help_center/(?:[a-z-]+/)?categories/(\d+)/sections\.json$", v_path)
+    if match:
+        v_categoryid = int(match.group(1))
+        l_sections = [d_section for d_section in d_Data['sections'] if d_section['category_id'] == v_categoryid]
+        return fn_paginate(l_sections, "sections", d_query, v_pageurl)
+
+    match = re.match(r"^/api/v2/help_center/(?:[a-z-]+/)?(categories|sections)/(\d+)/articles\.json$", v_path)
+    if match:
+        v_key = "_category_id" if match.group(1) == "categories" else "section_id"
+        v_id = int(match.group(2))
+        v_include = "translations" in d_query.get('include', [""])[0].split(",")
+        l_articles = [fn_public_article(d_article, v_include) for d_article in d_Data['articles'] if d_article[v_key] == v_id]
+        return fn_paginate(l_articles, "articles", d_query, v_pageurl)
+
+    match = re.match(r"^/api/v2/help_center/(?:[a-z-]+/)?articles/(\d+)/translations\.json$", v_path)
+    if match:
+        v_id = int(match.group(1))
+        l_locales = d_query.get('locales', [""])[0].split(",") if 'locales' in d_query else None
+        for d_article in d_Data['articles']:
+            if d_article['id'] == v_id:
+                l_translations = [
+                    d_translation for d_translation in d_article['translations']
+                    if l_locales is None or d_translation['locale'] in l_locales
+                ]
+                return fn_paginate(l_translations, "translations", d_query, v_pageurl)
+        return None
+
+    # The incremental API returns ( at most 1000 ) articles updated since start_time, oldest first.
+    # Like the real export the next page starts at the end_time, the articles of that second are sent again.
+
+    if v_path == "/api/v2/help_center/incremental/articles.json":
+        v_starttime = int(d_query.get('start_time', ["0"])[0])
+        l_articles = sorted(
+            [d_article for d_article in d_Data['articles'] if d_article['_updated'] >= v_starttime],
+            key=lambda d_article: (d_article['_updated'], d_article['id'])
+        )
+        l_page = l_articles[:1000]
+        v_endtime = l_page[-1]['_updated'] if l_page else v_starttime
+        return {
+            "articles": [fn_public_article(d_article, False) for d_article in l_page],
+            "count": len(l_page),
+            "end_time": v_endtime,
+            "next_page": "{0}?start_time={1}".format(v_pageurl, v_endtime) if len(l_articles) > 1000 else None
+        }
+
+    return None
+
+
+# Step 3:
+# Record and replay the responses of the real help center
+# Function : fn_fixture_path(v_directory, v_pathquery)
+# The fixture of a request is a json file named by the hash of its path and query ( sorted )
+
+
+def fn_fixture_path(v_directory, v_pathquery):
+    url = urlparse(v_pathquery)
+    v_key = url.path + "?" + "&".join(sorted(url.query.split("&"))) if url.query else url.path
+    return os.path.join(v_directory, hashlib.sha1(v_key.encode('utf-8')).hexdigest() + ".json")
+
+
+# Function : fn_record_request(v_pathquery, d_headers)
+# Send the request to v_Upstream, save the status and the body on v_RecordDir and return them.
+# The upstream url in the body ( eg.s next_page ) is saved as "{base}" so the fixtures can be replayed on any port.
+
+
+def fn_record_request(v_pathquery, d_headers):
+    request = Request(v_Upstream + v_pathquery)
+    if d_headers.get('Authorization'):
+        request.add_header('Authorization', d_headers['Authorization'])
+    request.add_header('Content-Type', 'application/json')
+    try:
+        response = urlopen(request)
+        v_status, v_body = response.getcode(), response.read()
+    except HTTPError as e:
+        v_status, v_body = e.code, e.read()
+    v_body = v_body.decode('utf-8').replace(v_Upstream, "{base}")
+
+    if v_status == 200:
+        if not os.path.isdir(v_RecordDir):
+            os.makedirs(v_RecordDir)
+        fob = open(fn_fixture_path(v_RecordDir, v_pathquery), 'w')
+        json.dump({"request": v_pathquery, "status": v_status, "body": v_body}, fob)
+        fob.close()
+        logger.debug("Recorded fixture: '{}'".format(v_pathquery))
+
+    return v_status, v_body
+
+
+# Function : fn_replay_request(v_pathquery)
+# Read the status and the body of the request from the fixture on v_ReplayDir, None if it was not recorded
+
+
+def fn_replay_request(v_pathquery):
+    v_fixture = fn_fixture_path(v_ReplayDir, v_pathquery)
+    if not os.path.exists(v_fixture):
+        logger.warning("No fixture recorded for: '{}'".format(v_pathquery))
+        return None
+    fob = open(v_fixture, 'r')
+    d_fixture = json.load(fob)
+    fob.close()
+    return d_fixture['status'], d_fixture['body']
+
+
+# Step 4:
+# Answer the requests
+# Function : fn_rate_limited()
+# Count the request and returns True when it has to be answered with "429 Too Many Requests"
+# Also returns the requests left on the current minute for the X-Rate-Limit-Remaining header.
+
+
+d_RateLimit = {'requests': 0, 'minute': 0, 'minute_requests': 0}
+v_RateLimitLock = threading.Lock()
+
+
+def fn_rate_limited():
+    with v_RateLimitLock:
+        v_minute = int(time.time() // 60)
+        if v_minute != d_RateLimit['minute']:
+            d_RateLimit['minute'] = v_minute
+            d_RateLimit['minute_requests'] = 0
+        d_RateLimit['requests'] += 1
+        d_RateLimit['minute_requests'] += 1
+        v_remaining = max(0, v_RateLimit - d_RateLimit['minute_requests'])
+        v_limited = d_RateLimit['minute_requests'] > v_RateLimit or (
+            v_RateLimitEvery > 0 and d_RateLimit['requests'] % v_RateLimitEvery == 0
+        )
+    return v_limited, v_remaining
+
+
+# Function : fn_send_response(handler, v_status, v_body, d_headers)
+# Send the body with the ETag ( "304 Not Modified" when it matches If-None-Match ), gzip it when it is accepted
+
+
+def fn_send_response(handler, v_status, v_body, d_headers):
+    if not isinstance(v_body, bytes):
+        v_body = v_body.encode('utf-8')
+
+    v_etag = '"{}"'.format(hashlib.md5(v_body).hexdigest())
+    if v_status == 200 and handler.headers.get('If-None-Match') == v_etag:
+        v_status, v_body = 304, b""
+    elif v_body and v_Compress and "gzip" in handler.headers.get('Accept-Encoding', ""):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        v_body = compressor.compress(v_body) + compressor.flush()
+        d_headers['Content-Encoding'] = "gzip"
+
+    handler.send_response(v_status)
+    if v_status in (200, 304):
+        d_headers['ETag'] = v_etag
+    if v_status == 200:
+        d_headers['Content-Type'] = "application/json; charset=utf-8"
+    d_headers['Content-Length'] = str(len(v_body))
+    for v_header, v_value in d_headers.items():
+        handler.send_header(v_header, v_value)
+    handler.end_headers()
+    handler.wfile.write(v_body)
+
+
+# Function : fn_handle_request(handler)
+# Answer a GET request from the synthetic data ( or the fixtures ) after the latency and the 429 injection
+
+
+def fn_handle_request(handler):
+    if v_Latency:
+        time.sleep(v_Latency / 1000.0)
+
+    v_limited, v_remaining = fn_rate_limited()
+    d_headers = {'X-Rate-Limit': str(v_RateLimit), 'X-Rate-Limit-Remaining': str(v_remaining)}
+    if v_limited:
+        logger.debug("Rate limited: '{}'".format(handler.path))
+        d_headers['Retry-After'] = str(v_RetryAfter)
+        return fn_send_response(handler, 429, b"", d_headers)
+
+    url = urlparse(handler.path)
+    v_base = "http://" + handler.headers.get('Host', "127.0.0.1:{}".format(v_Port))
+
+    if v_RecordDir is not None:
+        v_status, v_body = fn_record_request(handler.path, handler.headers)
+        return fn_send_response(handler, v_status, v_body.replace("{base}", v_base), d_headers)
+
+    if v_ReplayDir is not None:
+        t_fixture = fn_replay_request(handler.path)
+        if t_fixture is None:
+            return fn_send_response(handler, 404, b"", d_headers)
+        return fn_send_response(handler, t_fixture[0], t_fixture[1].replace("{base}", v_base), d_headers)
+
+    data = fn_route_request(url.path, parse_qs(url.query), v_base)
+    if data is None:
+        logger.warning("Unknown endpoint: '{}'".format(handler.path))
+        return fn_send_response(handler, 404, b"", d_headers)
+    return fn_send_response(handler, 200, json.dumps(data), d_headers)
+
+
+# The HTTP server ( the standard library only offers the server as classes ), every request runs on its own thread
+# and the connections are kept alive ( HTTP/1.1 ) like the real API.
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        logger.debug("GET: '{}'".format(self.path))
+        fn_handle_request(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+# Step 5:
+# Function : main()
+# Build the synthetic data ( unless the fixtures are recorded / replayed ) and serve the requests till stopped
+
+
+d_Data = None
+
+
+def main():
+    global d_Data
+
+    # Start program message
+
+    logger.info("Start of the program: '{}'".format(__file__))
+
+    if v_RecordDir is not None:
+        logger.info("Recording the responses of '{0}' on: '{1}'".format(v_Upstream, v_RecordDir))
+    elif v_ReplayDir is not None:
+        logger.info("Replaying the responses from: '{}'".format(v_ReplayDir))
+    else:
+        d_Data = fn_build_data(v_Now if v_Now is not None else int(time.time()))
+
+    server = MockServer(("127.0.0.1", v_Port), MockHandler)
+    logger.info("Serving the API on: 'http://127.0.0.1:{}'".format(v_Port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+    # End program message
+
+    logger.info("End of the program: '{}'".format(__file__))
+
+
+# Step 6
+# Read the options and start the program
+
+
+if __name__ == "__main__":
+    fn_server_args(sys.argv[1:])
+    main()